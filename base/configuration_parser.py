@@ -3,6 +3,10 @@
 @author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
 
 @description: PyDash Project
+
+The instance returned by get_instance() reads dash_client.json and is
+shared by the default Session. Other sessions build their own parser
+from a parameters dict.
 """
 import json
 
@@ -13,17 +17,34 @@ class ConfigurationParser():
     @staticmethod
     def get_instance():
         if ConfigurationParser.__instance is None:
-            ConfigurationParser()
+            ConfigurationParser.__instance = ConfigurationParser()
         return ConfigurationParser.__instance
 
-    def __init__(self):
-        if ConfigurationParser.__instance is not None:
-            raise Exception('This class is a singleton!')
-        else:
+    def __init__(self, config_parameters=None):
+        if config_parameters is None:
             with open('dash_client.json') as f:
-                self.config_parameters = json.load(f)
+                config_parameters = json.load(f)
 
-            ConfigurationParser.__instance = self
+        self.config_parameters = config_parameters
 
     def get_parameter(self, key):
         return self.config_parameters[key]
+
+    def get_boolean_parameter(self, key):
+        """
+        It returns the flag key, given as a json boolean or number, or as a
+        string (e.g. from a sweep grid) such as "true" or "0".
+        """
+        value = self.config_parameters[key]
+        if isinstance(value, str):
+            if value.strip().lower() in ('true', 'yes', 'on', '1'):
+                return True
+            if value.strip().lower() in ('false', 'no', 'off', '0', ''):
+                return False
+
+            raise ValueError(f'{key} parameter should be true or false, not {value!r}')
+
+        return bool(value)
+
+    def set_parameter(self, key, value):
+        self.config_parameters[key] = value
@@ -5,6 +5,7 @@
 @description: PyDash Project
 """
 
+from array import array
 from enum import Enum
 
 
@@ -22,6 +23,11 @@ class Message:
         self.kind = kind
         self.bit_length = 0
 
+        # wall clock seconds spent opening the connection (0 if a persistent
+        # one was reused) and transferring the request and the response
+        self.connect_time = 0
+        self.transfer_time = 0
+
     def get_payload(self):
         return self.payload
 
@@ -37,6 +43,18 @@ class Message:
     def get_bit_length(self):
         return self.bit_length
 
+    def add_connect_time(self, connect_time):
+        self.connect_time = connect_time
+
+    def get_connect_time(self):
+        return self.connect_time
+
+    def add_transfer_time(self, transfer_time):
+        self.transfer_time = transfer_time
+
+    def get_transfer_time(self):
+        return self.transfer_time
+
 
 # Segment Size Message
 class SSMessage(Message):
@@ -47,11 +65,30 @@ class SSMessage(Message):
 
         self.path_name = ''
         self.media_mpd = ''
+        # media_mpd with $Bandwidth$ and $Number$, get_url() replaces them in media_mpd
+        self.media_template = ''
         self.host_name = ''
         self.quality_id = 0
         self.segment_id = 0
         self.__found = True
 
+        # download progress: the Timer time the request was sent, the time
+        # (s) until the first byte arrived, including the connection setup,
+        # and the Timer time and the length (bytes) of each chunk received
+        self.download_started_at = 0
+        self.ttfb = 0
+        # the request time plus the time the transfer waited for the ones
+        # ahead of it on the link (pipelined segments share it)
+        self.transfer_started_at = 0
+        self.chunk_times = array('d')
+        self.chunk_lengths = array('L')
+        self.received_length = 0
+
+        # called by the ConnectionHandler during the download, see IR2A.should_abandon()
+        self.abandonment_policy = None
+        # (time, quality_id, new quality_id, wasted bytes) of each abandoned download
+        self.abandonments = []
+
     def __str__(self):
         return f'{self.segment_id}, {self.quality_id}, {self.bit_length}, {self.__found}, {self.path_name}, {self.media_mpd}, {self.host_name}'
 
@@ -77,6 +114,7 @@ class SSMessage(Message):
 
     def add_media_mpd(self, media_mpd):
         self.media_mpd = media_mpd
+        self.media_template = media_mpd
 
     def add_quality_id(self, quality_id):
         self.quality_id = quality_id
@@ -84,6 +122,83 @@ class SSMessage(Message):
     def get_quality_id(self):
         return self.quality_id
 
+    def add_download_started_at(self, download_started_at):
+        self.download_started_at = download_started_at
+
+    def get_download_started_at(self):
+        return self.download_started_at
+
+    def add_transfer_started_at(self, transfer_started_at):
+        self.transfer_started_at = transfer_started_at
+
+    def get_transfer_started_at(self):
+        """
+        It returns when the transfer started on the link, the time a
+        throughput must be measured from.
+        """
+        return self.transfer_started_at
+
+    def add_ttfb(self, ttfb):
+        self.ttfb = ttfb
+
+    def get_ttfb(self):
+        return self.ttfb
+
+    def add_chunk(self, t, length):
+        self.chunk_times.append(t)
+        self.chunk_lengths.append(length)
+        self.received_length += length
+
+    def clear_chunks(self):
+        self.chunk_times = array('d')
+        self.chunk_lengths = array('L')
+        self.received_length = 0
+
+    def get_received_length(self):
+        return self.received_length
+
+    def add_abandonment_policy(self, abandonment_policy):
+        self.abandonment_policy = abandonment_policy
+
+    def get_abandonment_policy(self):
+        return self.abandonment_policy
+
+    def add_abandonment(self, t, quality_id, new_quality_id, wasted_length):
+        self.abandonments.append((t, quality_id, new_quality_id, wasted_length))
+
+    def get_abandonments(self):
+        """
+        It returns a tuples list of time, quality_id, new quality_id and
+        wasted bytes of each download of this segment that was abandoned.
+        """
+        return self.abandonments
+
+    def get_chunks(self):
+        """
+        It returns a tuples list of time and length (bytes) of the chunks received.
+        """
+        return tuple(zip(self.chunk_times, self.chunk_lengths))
+
+    def get_throughput_samples(self):
+        """
+        It returns a tuples list of time and throughput (bps) measured during
+        the download, one sample for each chunk (chunks received at the same
+        time are merged in a single sample).
+        """
+        samples = []
+        last_time = self.download_started_at + self.ttfb
+        bits = 0
+
+        # parallel range requests may record their chunks out of order
+        for t, length in sorted(zip(self.chunk_times, self.chunk_lengths)):
+            bits += 8 * length
+            if t > last_time:
+                samples.append((t, bits / (t - last_time)))
+                last_time = t
+                bits = 0
+
+        return tuple(samples)
+
     def set_found(self, status=True):
         self.__found = status
 
@@ -91,6 +206,6 @@ class SSMessage(Message):
         return bool(self.bit_length > 0 and self.__found)
 
     def get_url(self):
-        self.media_mpd = self.media_mpd.replace('$Bandwidth$', str(self.quality_id))
+        self.media_mpd = self.media_template.replace('$Bandwidth$', str(self.quality_id))
         self.media_mpd = self.media_mpd.replace('$Number$', str(self.segment_id))
         return self.path_name + '/' + self.media_mpd
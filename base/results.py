@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+The raw series of a session, to be plot later. The modules add their
+plots (one or more lines of x, y values) in the finalization, and the
+DashClient saves all of them in a single results file (.npz), so the
+session doesn't pay for matplotlib. render_results() (or render.py,
+for many files in parallel) turns a results file into PNG images,
+downsampling the long lines with LTTB before drawing them.
+
+numpy and matplotlib are only imported when a file is saved or drawn.
+"""
+
+import json
+import os
+
+results_file_name = 'series.npz'
+
+
+class Results:
+
+    def __init__(self):
+        # file name (without extension) -> plot description and lines
+        self.plots = {}
+
+    def add_plot(self, file_name, lines, title, y_label, x_label):
+        """
+        Adds a plot of lines, a list of (label, x, y) tuples, x and y are
+        sequences of numbers (lists, arrays, numpy arrays). They must not be
+        memoryviews: the plots of another process are pickled.
+        """
+        self.plots[file_name] = ({'title': title, 'y_label': y_label, 'x_label': x_label,
+                                  'labels': [label for label, _, _ in lines]},
+                                 [(x, y) for _, x, y in lines])
+
+    def add_plots(self, plots):
+        """
+        Adds the plots of another Results (e.g. of another process).
+        """
+        self.plots.update(plots)
+
+    def __len__(self):
+        return len(self.plots)
+
+    def save(self, file_name):
+        """
+        Saves every plot in a .npz file, the plot descriptions go as json
+        (no pickle is needed to read it back).
+        """
+        import numpy as np
+
+        arrays = {}
+        description = {}
+        for plot_name, (plot, lines) in self.plots.items():
+            description[plot_name] = plot
+            for i, (x, y) in enumerate(lines):
+                arrays[f'{plot_name}/{i}/x'] = np.asarray(x, dtype=np.float64)
+                arrays[f'{plot_name}/{i}/y'] = np.asarray(y, dtype=np.float64)
+
+        np.savez(file_name, description=np.array(json.dumps(description)), **arrays)
+
+
+def load_results(file_name, plot_names=None):
+    """
+    It returns a list of (plot name, plot description, lines) tuples of a
+    results file (only of the plot_names ones, if given), lines is a list
+    of (label, x, y) numpy arrays tuples.
+    """
+    import numpy as np
+
+    with np.load(file_name) as data:
+        description = json.loads(str(data['description']))
+
+        plots = []
+        for plot_name, plot in description.items():
+            if plot_names is not None and plot_name not in plot_names:
+                continue
+
+            lines = [(label, data[f'{plot_name}/{i}/x'], data[f'{plot_name}/{i}/y'])
+                     for i, label in enumerate(plot['labels'])]
+            plots.append((plot_name, plot, lines))
+
+    return plots
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling. It returns up to
+    threshold points of (x, y) keeping the visual shape of the line: the
+    first and last points, and from each bucket in between the point
+    making the largest triangle with the previous selected point and the
+    average of the next bucket.
+    """
+    import numpy as np
+
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # threshold - 2 buckets over the points between the first and the last one
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+
+        areas = np.abs((x[a] - average_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (average_y - y[a]))
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+
+    return x[selected], y[selected]
+
+
+def render_plot(results_dir, plot_name, plot, lines, max_points=2000):
+    """
+    Draws a plot of load_results() as results_dir/plot_name.png.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import pyplot
+
+    for label, x, y in lines:
+        x, y = lttb(x, y, max_points)
+        pyplot.plot(x, y, label=label)
+
+    pyplot.xlabel(plot['x_label'])
+    pyplot.ylabel(plot['y_label'])
+    pyplot.title(plot['title'])
+    pyplot.legend()
+
+    file_name = os.path.join(results_dir, f'{plot_name}.png')
+    pyplot.savefig(file_name)
+    pyplot.clf()
+    pyplot.cla()
+    pyplot.close()
+
+    return file_name
+
+
+def get_plot_names(file_name):
+    """
+    It returns the names of the plots of a results file, without reading their lines.
+    """
+    import numpy as np
+
+    with np.load(file_name) as data:
+        return list(json.loads(str(data['description'])))
+
+
+def render_results(file_name, max_points=2000):
+    """
+    Draws every plot of a results file next to it, in this process. It
+    returns the images file names.
+    """
+    results_dir = os.path.dirname(file_name)
+
+    return [render_plot(results_dir, plot_name, plot, lines, max_points)
+            for plot_name, plot, lines in load_results(file_name)]
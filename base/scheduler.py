@@ -4,22 +4,108 @@
 
 @description: PyDash Project
 
-The Scheduler is a Singleton class implementation
+Each Session has its own Scheduler, get_instance() returns the
+default Session one.
+
+Events are kept in a heap ordered by (due time, arrival order), so the
+events due at the same time are delivered in FIFO order. Delivering an
+event moves the Timer to its due time.
+
+In the asyncio runtime the Scheduler also keeps the tasks (network
+transfers) started by the modules and wakes up the DashClient loop
+whenever a new event arrives.
 """
 
-from base.singleton import Singleton
+import heapq
+
+from base.timer import Timer
 
 
-class Scheduler(metaclass=Singleton):
+class Scheduler():
+    __instance = None
 
-    def __init__(self):
+    @staticmethod
+    def get_instance():
+        if Scheduler.__instance is None:
+            Scheduler.__instance = Scheduler()
+        return Scheduler.__instance
+
+    def __init__(self, timer=None):
+        # heap of (due_time, sequence number, event)
         self.events = []
+        self.events_seq = 0
+        self.timer = Timer.get_instance() if timer is None else timer
+
+        # asyncio runtime
+        self.tasks = set()
+        self.failed_tasks = []
+        self.wakeup = None
+
+    def get_current_time(self):
+        return self.timer.get_current_time()
 
     def add_event(self, event):
-        self.events.append(event)
+        # events without a due time are delivered as soon as possible
+        if event.get_due_time() is None:
+            event.set_due_time(self.timer.get_current_time())
+
+        heapq.heappush(self.events, (event.get_due_time(), self.events_seq, event))
+        self.events_seq += 1
+
+        if self.wakeup is not None:
+            self.wakeup.set()
 
     def get_event(self):
-        return self.events.pop(0)
+        due_time, _, event = heapq.heappop(self.events)
+        self.timer.wait_until(due_time)
+        return event
+
+    def get_next_due_time(self):
+        return self.events[0][0]
 
     def is_empty(self):
-        return bool(self.events == [])
+        return not self.events
+
+    def add_task(self, coroutine):
+        """
+        Runs coroutine as a task of the running asyncio loop. The client
+        doesn't finish while there is a task running.
+        """
+        # only imported by the asyncio runtime, it is slow to load
+        import asyncio
+
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.task_done)
+
+    def task_done(self, task):
+        self.tasks.discard(task)
+
+        if not task.cancelled() and task.exception() is not None:
+            self.failed_tasks.append(task)
+
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def has_tasks(self):
+        if self.failed_tasks:
+            raise self.failed_tasks.pop(0).exception()
+
+        return bool(self.tasks)
+
+    async def wait_wakeup(self, timeout=None):
+        """
+        Waits up to timeout seconds (forever if None) for a new event or
+        the end of a task.
+        """
+        import asyncio
+
+        if self.wakeup is None:
+            self.wakeup = asyncio.Event()
+
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        self.wakeup.clear()
@@ -8,10 +8,12 @@
 
 class SchedulerEvent:
 
-    def __init__(self, msg, src, dst):
+    def __init__(self, msg, src, dst, due_time=None):
         self.origin = src
         self.destination = dst
         self.msg = msg
+        # Timer instant the event must be delivered, None means now
+        self.due_time = due_time
 
     def get_src(self):
         return self.origin
@@ -21,3 +23,9 @@ class SchedulerEvent:
 
     def get_msg(self):
         return self.msg
+
+    def get_due_time(self):
+        return self.due_time
+
+    def set_due_time(self, due_time):
+        self.due_time = due_time
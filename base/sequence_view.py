@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+A read only, live view of a sequence (list, tuple or array) growing at
+its end, as the Whiteboard histories. Creating it copies nothing, and
+read_since() returns only the samples added after a cursor, so a reader
+doesn't go through the whole history at each call.
+"""
+
+
+class SequenceView:
+
+    def __init__(self, sequence):
+        self.__sequence = sequence
+
+    def __len__(self):
+        return len(self.__sequence)
+
+    def __getitem__(self, key):
+        return self.__sequence[key]
+
+    def __iter__(self):
+        return iter(self.__sequence)
+
+    def __str__(self):
+        return list(self.__sequence).__str__()
+
+    def read_since(self, cursor=0):
+        """
+        It returns a (samples, cursor) tuple: the samples added since the
+        cursor (0 is the beginning) and the cursor for the next call.
+        """
+        length = len(self.__sequence)
+        return self.__sequence[cursor:length], length
+
+
+def as_view(sequence):
+    """
+    It returns sequence itself if it is already a view, or a SequenceView of it.
+    """
+    if hasattr(sequence, 'read_since'):
+        return sequence
+
+    return SequenceView(sequence)
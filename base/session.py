@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+A Session holds everything shared by the modules of one DashClient:
+the configuration, the Timer, the Scheduler, the Whiteboard and the
+Results (raw series to be plot).
+
+The default Session is made of the get_instance() objects, so code
+using them directly keeps working. Independent sessions can live in
+the same process, running one after another or interleaved, as long
+as each DashClient gets its own Session.
+"""
+
+from base.configuration_parser import ConfigurationParser
+from base.results import Results
+from base.scheduler import Scheduler
+from base.timer import Timer
+from base.whiteboard import Whiteboard
+
+
+class Session:
+    __default = None
+
+    @staticmethod
+    def get_default():
+        if Session.__default is None:
+            Session.__default = Session(ConfigurationParser.get_instance(), Timer.get_instance(),
+                                        Scheduler.get_instance(), Whiteboard.get_instance())
+        return Session.__default
+
+    @staticmethod
+    def from_parameters(config_parameters):
+        """
+        Creates an independent Session from a configuration parameters
+        dict (the same keys of dash_client.json).
+        """
+        config_parser = ConfigurationParser(config_parameters)
+        timer = Timer(config_parser)
+        return Session(config_parser, timer, Scheduler(timer), Whiteboard(timer))
+
+    def __init__(self, config_parser, timer, scheduler, whiteboard):
+        self.config_parser = config_parser
+        self.timer = timer
+        self.scheduler = scheduler
+        self.whiteboard = whiteboard
+        self.results = Results()
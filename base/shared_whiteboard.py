@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+A Whiteboard in shared memory (multiprocessing.shared_memory), so an
+R2A running in another process (see r2a/r2aprocess.py) reads the state
+of the Player without any message.
+
+The block has a fixed layout of float64 numpy arrays:
+
+- the live state (the PlaybackSnapshot fields, the amount of video to
+  play, the maximum buffer size and the throughput estimators), guarded
+  by a seqlock: its first slot is odd while it is being written and the
+  readers try again until they copy it between two equal even values
+  (or the writer process is gone, see read_state());
+- a ring of the last 'capacity' (t, value) samples of each history and
+  how many samples were ever written in it. A sample is written before
+  the count grows, and a reader drops the samples overwritten while it
+  was copying them.
+
+SharedWhiteboard is the writer, in the Player process: update() copies
+what changed in the Whiteboard since the previous call. The
+SharedWhiteboardReader, in the R2A process, has the Whiteboard getters.
+The QoE metrics and the QI of the segments in the buffer aren't shared,
+their getters raise NotImplementedError.
+"""
+
+import math
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from base.whiteboard import PlaybackSnapshot
+
+histories = ['playback_history', 'playback_qi', 'playback_pauses', 'playback_buffer_size',
+             'playback_segment_size_time_at_buffer']
+# histories of integer values
+integer_histories = ['playback_history', 'playback_qi']
+
+# failed reads of the state between two checks of the writer process
+READ_ATTEMPTS = 1000
+
+# state slots (SEQUENCE is the seqlock), the throughput quantiles go after them
+(SEQUENCE, VERSION, TIME, BUFFER_LEVEL, PLAYING, LAST_QI, LAST_PAUSE, LAST_THROUGHPUT, AMOUNT_VIDEO_TO_PLAY,
+ MAX_BUFFER_SIZE, THROUGHPUT_MEAN, THROUGHPUT_HARMONIC_MEAN, THROUGHPUT_EWMA, QUANTILES) = range(14)
+
+
+def get_layout(capacity, quantiles):
+    """
+    It returns the {name: (offset, shape)} arrays of a block, and its size in bytes.
+    """
+    shapes = [('state', (QUANTILES + len(quantiles),)), ('counts', (len(histories),))]
+    shapes += [(name, (capacity, 2)) for name in histories]
+
+    layout = {}
+    size = 0
+    for name, shape in shapes:
+        layout[name] = (size, shape)
+        size += 8 * math.prod(shape)
+
+    return layout, size
+
+
+def to_slot(value):
+    return math.nan if value is None else float(value)
+
+
+def from_slot(value):
+    return None if math.isnan(value) else value
+
+
+class SharedBlock:
+
+    def __init__(self, capacity, quantiles, name=None):
+        self.capacity = capacity
+        self.quantiles = list(quantiles)
+
+        layout, size = get_layout(capacity, self.quantiles)
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+
+        self.arrays = {array_name: np.ndarray(shape, dtype=np.float64, buffer=self.memory.buf, offset=offset)
+                       for array_name, (offset, shape) in layout.items()}
+
+    def get_name(self):
+        return self.memory.name
+
+    def close(self):
+        # the arrays must go before the memory they are made of
+        self.arrays = {}
+        self.memory.close()
+
+
+class SharedWhiteboard(SharedBlock):
+
+    def __init__(self, whiteboard, capacity, quantiles):
+        SharedBlock.__init__(self, capacity, quantiles)
+        self.whiteboard = whiteboard
+
+        self.arrays['state'][:] = math.nan
+        self.arrays['state'][SEQUENCE] = 0
+        self.arrays['counts'][:] = 0
+        # read_since() cursors of the Whiteboard histories
+        self.cursors = [0] * len(histories)
+
+    def update(self):
+        """
+        Copies the state and the new history samples of the Whiteboard.
+        """
+        whiteboard = self.whiteboard
+        snapshot = whiteboard.get_playback_snapshot()
+
+        values = list(snapshot) + [whiteboard.get_amount_video_to_play(), whiteboard.get_max_buffer_size(),
+                                   whiteboard.get_throughput_mean(), whiteboard.get_throughput_harmonic_mean(),
+                                   whiteboard.get_throughput_ewma()]
+        values += [whiteboard.get_throughput_quantile(p) for p in self.quantiles]
+
+        state = self.arrays['state']
+        state[SEQUENCE] += 1
+        state[VERSION:] = [to_slot(value) for value in values]
+        state[SEQUENCE] += 1
+
+        for i, name in enumerate(histories):
+            samples, self.cursors[i] = getattr(whiteboard, f'get_{name}')().read_since(self.cursors[i])
+            self.append(i, name, samples)
+
+    def append(self, i, name, samples):
+        if len(samples) == 0:
+            return
+
+        ring = self.arrays[name]
+        counts = self.arrays['counts']
+        samples = np.asarray(samples, dtype=np.float64).reshape(len(samples), -1)[-self.capacity:]
+
+        count = int(counts[i])
+        positions = (count + np.arange(len(samples))) % self.capacity
+        # time_at_buffer has no time, only the value
+        ring[positions, 2 - samples.shape[1]:] = samples
+        counts[i] = count + len(samples)
+
+    def unlink(self):
+        # it may be called again, e.g. at the finalization after an error
+        if self.memory.buf is None:
+            return
+
+        self.close()
+        self.memory.unlink()
+
+
+class SharedHistoryView:
+    """
+    A read only view of the samples of a history still in the ring.
+    """
+
+    def __init__(self, block, i, name):
+        self.block = block
+        self.i = i
+        self.name = name
+
+    def read_since(self, cursor=0):
+        """
+        It returns a (samples, cursor) tuple, as SequenceView.read_since().
+        The samples older than the ring are lost.
+        """
+        ring = self.block.arrays[self.name]
+        capacity = self.block.capacity
+        count = int(self.block.arrays['counts'][self.i])
+
+        cursor = max(cursor, count - capacity)
+        samples = ring[np.arange(cursor, count) % capacity].copy()
+
+        # the writer may have gone around the ring meanwhile
+        lost = int(self.block.arrays['counts'][self.i]) - capacity - cursor
+        if lost > 0:
+            samples = samples[lost:]
+
+        if self.name == 'playback_segment_size_time_at_buffer':
+            return samples[:, 1].tolist(), count
+
+        if self.name in integer_histories:
+            return [(t, int(value)) for t, value in samples.tolist()], count
+
+        return [tuple(sample) for sample in samples.tolist()], count
+
+    def __len__(self):
+        return min(int(self.block.arrays['counts'][self.i]), self.block.capacity)
+
+    def __iter__(self):
+        return iter(self.read_since(0)[0])
+
+    def __getitem__(self, key):
+        return self.read_since(0)[0][key]
+
+    def __str__(self):
+        return self.read_since(0)[0].__str__()
+
+
+class SharedWhiteboardReader(SharedBlock):
+
+    def __init__(self, name, capacity, quantiles):
+        SharedBlock.__init__(self, capacity, quantiles, name)
+        self.views = {name: SharedHistoryView(self, i, name) for i, name in enumerate(histories)}
+
+    def read_state(self):
+        """
+        It returns a consistent copy of the state. It raises RuntimeError if
+        the writer, the parent process, exited in the middle of an update.
+        """
+        state = self.arrays['state']
+
+        attempts = 0
+        while True:
+            sequence = state[SEQUENCE]
+            if sequence % 2 == 0:
+                values = state.tolist()
+                if state[SEQUENCE] == sequence:
+                    return values
+
+            attempts += 1
+            if attempts % READ_ATTEMPTS == 0:
+                writer = multiprocessing.parent_process()
+                if writer is not None and not writer.is_alive():
+                    raise RuntimeError('the writer of the shared Whiteboard exited in the middle of an update')
+
+    def get_playback_snapshot(self):
+        state = self.read_state()
+        last_qi = from_slot(state[LAST_QI])
+        return PlaybackSnapshot(int(state[VERSION]), state[TIME], state[BUFFER_LEVEL], bool(state[PLAYING]),
+                                None if last_qi is None else int(last_qi), from_slot(state[LAST_PAUSE]),
+                                from_slot(state[LAST_THROUGHPUT]))
+
+    def get_amount_video_to_play(self):
+        return self.read_state()[AMOUNT_VIDEO_TO_PLAY]
+
+    def get_max_buffer_size(self):
+        return int(self.read_state()[MAX_BUFFER_SIZE])
+
+    def get_last_throughput(self):
+        return from_slot(self.read_state()[LAST_THROUGHPUT])
+
+    def get_throughput_mean(self):
+        return from_slot(self.read_state()[THROUGHPUT_MEAN])
+
+    def get_throughput_harmonic_mean(self):
+        return from_slot(self.read_state()[THROUGHPUT_HARMONIC_MEAN])
+
+    def get_throughput_ewma(self):
+        return from_slot(self.read_state()[THROUGHPUT_EWMA])
+
+    def get_throughput_quantile(self, p):
+        return from_slot(self.read_state()[QUANTILES + self.quantiles.index(p)])
+
+    def get_buffer(self):
+        raise NotImplementedError('the QI of the segments in the buffer aren\'t shared with another process')
+
+    def get_qoe(self):
+        raise NotImplementedError('the QoE metrics aren\'t shared with another process')
+
+    def get_playback_history(self):
+        return self.views['playback_history']
+
+    def get_playback_qi(self):
+        return self.views['playback_qi']
+
+    def get_playback_pauses(self):
+        return self.views['playback_pauses']
+
+    def get_playback_buffer_size(self):
+        return self.views['playback_buffer_size']
+
+    def get_playback_segment_size_time_at_buffer(self):
+        return self.views['playback_segment_size_time_at_buffer']
@@ -10,26 +10,47 @@ Class implements basic functionality to be called by the main program.
 """
 
 from abc import ABCMeta, abstractmethod
-from base.scheduler import Scheduler
 from base.scheduler_event import SchedulerEvent
 from base.message import Message, MessageKind
+from base.session import Session
 
 
 class SimpleModule(metaclass=ABCMeta):
 
-    def __init__(self, id):
-        self.scheduler = Scheduler()
+    def __init__(self, id, session=None):
+        # modules created without a session belong to the default one
+        self.session = Session.get_default() if session is None else session
+        self.scheduler = self.session.scheduler
         self.id = id
 
-    def send_up(self, msg):
-        self.scheduler.add_event(SchedulerEvent(msg, self.id, self.id - 1))
+    def send_up(self, msg, delay=0):
+        self.schedule_after(msg, delay, self.id - 1)
 
         # if self.id == 0:
         #    print(f'Object {self} with id {self.id} is in the top of the control stack!')
         #    exit(0)
 
-    def send_down(self, msg):
-        self.scheduler.add_event(SchedulerEvent(msg, self.id, self.id + 1))
+    def send_down(self, msg, delay=0):
+        self.schedule_after(msg, delay, self.id + 1)
+
+    def send_self(self, msg, delay=0):
+        self.schedule_after(msg, delay)
+
+    def schedule_at(self, msg, due_time, dst=None):
+        """
+        Delivers msg to the module dst (itself by default) when the
+        Timer reaches due_time.
+        """
+        if dst is None:
+            dst = self.id
+
+        self.scheduler.add_event(SchedulerEvent(msg, self.id, dst, due_time))
+
+    def schedule_after(self, msg, delay, dst=None):
+        """
+        Delivers msg to the module dst (itself by default) delay seconds from now.
+        """
+        self.schedule_at(msg, self.scheduler.get_current_time() + delay, dst)
 
     @abstractmethod
     def initialize(self):
@@ -57,6 +78,10 @@ class SimpleModule(metaclass=ABCMeta):
     def handle_segment_size_response(self, msg):
         pass
 
+    def handle_self_message(self, msg):
+        # modules that schedule messages to themselves override it
+        pass
+
     def handle_message(self, msg):
         if msg.get_kind() == MessageKind.XML_REQUEST:
             self.handle_xml_request(msg)
@@ -66,6 +91,8 @@ class SimpleModule(metaclass=ABCMeta):
             self.handle_segment_size_request(msg)
         elif msg.get_kind() == MessageKind.SEGMENT_RESPONSE:
             self.handle_segment_size_response(msg)
+        elif msg.get_kind() == MessageKind.SELF:
+            self.handle_self_message(msg)
         else:
             raise ValueError(f'Invalid Message Kind - {msg}')
 
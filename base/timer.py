@@ -4,10 +4,17 @@
 
 @description: PyDash Project
 
-A Global timer reference used by all classes.
+A Global timer reference used by all classes. Each Session has
+its own Timer, get_instance() returns the default Session one.
+
+When the 'clock' parameter is 'virtual' the timer is a simulated
+clock: it only moves forward when the Scheduler delivers a timed
+event, so no one ever has to sleep.
 """
 import time
 
+from base.configuration_parser import ConfigurationParser
+
 
 class Timer():
     __instance = None
@@ -15,19 +22,41 @@ class Timer():
     @staticmethod
     def get_instance():
         if Timer.__instance is None:
-            Timer()
+            Timer.__instance = Timer()
         return Timer.__instance
 
-    def __init__(self):
-        if Timer.__instance is not None:
-            raise Exception('This class is a singleton!')
-        else:
-            # for the statistics purpose
-            self.started_time = time.perf_counter()
-            Timer.__instance = self
+    def __init__(self, config_parser=None):
+        if config_parser is None:
+            config_parser = ConfigurationParser.get_instance()
+
+        self.virtual = str(config_parser.get_parameter('clock')) == 'virtual'
+
+        # for the statistics purpose
+        self.started_time = time.perf_counter()
+        # simulated time, only used by the virtual clock
+        self.virtual_time = 0.0
+
+    def is_virtual(self):
+        return self.virtual
 
     def get_current_time(self):
+        if self.virtual:
+            return round(self.virtual_time, 6)
+
         return round(time.perf_counter() - self.started_time, 6)
 
     def get_started_time(self):
         return self.started_time
+
+    def wait_until(self, t):
+        """
+        Moves the clock up to the time t. The virtual clock just jumps
+        to t, the real one sleeps until t is reached.
+        """
+        if self.virtual:
+            self.virtual_time = max(self.virtual_time, t)
+            return
+
+        waiting_time = t - self.get_current_time()
+        if waiting_time > 0:
+            time.sleep(waiting_time)
@@ -5,9 +5,62 @@
 @description: PyDash Project
 
 Whiteboard structure to deliver statistical information
-from the Player to the R2A algorithms.
+from the Player to the R2A algorithms. Each Session has its own
+Whiteboard, get_instance() returns the default Session one.
+
+The histories are returned as read only, live views: they cost nothing
+to get and keep growing with the playback. view.read_since(cursor)
+returns only the samples added since a previous call, e.g.
+
+    samples, self.cursor = self.whiteboard.get_playback_qi().read_since(self.cursor)
+
+The amount of video to play is published as a PlaybackClock, the
+level of the buffer as a function of time, so an R2A reads the level of
+now (e.g. while it handles a response, before the Player plays the
+video due meanwhile), not the one of the last Player event.
+
+The current playback state is published as a PlaybackSnapshot, an
+immutable record replaced as a whole (double buffering, the reference
+swap is atomic), so a reader in any thread gets consistent values
+without a lock. Its version grows at each publication.
 """
 
+from collections import namedtuple
+
+from base.sequence_view import SequenceView, as_view
+from base.timer import Timer
+
+PlaybackSnapshot = namedtuple('PlaybackSnapshot', [
+    'version',          # grows at each snapshot
+    'time',             # when it was taken
+    'buffer_level',     # seconds of video to be played
+    'playing',          # False while buffering or paused
+    'last_qi',          # QI of the last second played, or None
+    'last_pause',       # length (s) of the last pause, or None
+    'last_throughput',  # bps of the last segment downloaded, or None
+])
+
+
+class PlaybackClock(namedtuple('PlaybackClock', [
+    'buffer_level',     # seconds of video to be played, now
+    'playing',          # False while buffering or paused
+    'next_play_at',     # time the next playback step starts
+    'playback_step',    # seconds of video played at each step
+])):
+    __slots__ = ()
+
+    def get_level(self, t):
+        """
+        It returns the seconds of video to be played at the time t: each
+        playback step due until t takes its seconds out of the buffer when
+        it starts.
+        """
+        if not self.playing or t < self.next_play_at:
+            return self.buffer_level
+
+        steps = int((t - self.next_play_at) // self.playback_step) + 1
+        return max(0, self.buffer_level - steps * self.playback_step)
+
 
 class Whiteboard:
     __instance = None
@@ -15,77 +68,153 @@ class Whiteboard:
     @staticmethod
     def get_instance():
         if Whiteboard.__instance is None:
-            Whiteboard()
+            Whiteboard.__instance = Whiteboard(Timer.get_instance())
         return Whiteboard.__instance
 
-    def __init__(self):
-        if Whiteboard.__instance is not None:
-            raise Exception('This class is a singleton!')
-        else:
-            Whiteboard.__instance = self
-            self.__buffer = []
-            self.__playback = []
-            self.__playback_qi = []
-            self.__playback_pauses = []
-            self.__playback_buffer_size = []
-            self.__playback_segment_size_time_at_buffer = []
-            # partial segment size time at buffer list
-            self.__partial_sstb = []
-            self.__max_buffer_size = 0
-            self.__amount_video_to_play = 0
+    def __init__(self, timer=None):
+        # the time the PlaybackClock is read at
+        self.__timer = timer
+        self.__buffer = None
+        self.__playback = SequenceView(())
+        self.__playback_qi = SequenceView(())
+        self.__playback_pauses = SequenceView(())
+        self.__playback_buffer_size = SequenceView(())
+        self.__playback_segment_size_time_at_buffer = SequenceView(())
+        self.__max_buffer_size = 0
+        self.__playback_clock = PlaybackClock(0, False, 0, 1)
+        self.__qoe = None
+        self.__throughput_estimators = None
+        self.__playback_snapshot = PlaybackSnapshot(0, 0, 0, False, None, None, None)
 
     def add_buffer(self, buffer):
         self.__buffer = buffer
 
-    def add_amount_video_to_play(self, amount_video_to_play):
-        self.__amount_video_to_play = amount_video_to_play
+    def add_playback_clock(self, playback_clock):
+        self.__playback_clock = playback_clock
+
+    def add_qoe(self, qoe):
+        self.__qoe = qoe
+
+    def add_playback_snapshot(self, playback_snapshot):
+        self.__playback_snapshot = playback_snapshot
+
+    def add_throughput_estimators(self, throughput_estimators):
+        self.__throughput_estimators = throughput_estimators
 
     def add_max_buffer_size(self, max_buffer_size):
         self.__max_buffer_size = max_buffer_size
 
     def add_playback_qi(self, playback_qi):
-        self.__playback_qi = playback_qi
+        self.__playback_qi = as_view(playback_qi)
 
     def add_playback_pauses(self, pauses):
-        self.__playback_pauses = pauses
+        self.__playback_pauses = as_view(pauses)
 
     def add_playback_buffer_size(self, buffer_size):
-        self.__playback_buffer_size = buffer_size
+        self.__playback_buffer_size = as_view(buffer_size)
 
     def add_playback_history(self, playback):
-        self.__playback = playback
+        self.__playback = as_view(playback)
 
     def add_playback_segment_size_time_at_buffer(self, segment_size_time_at_buffer):
-        self.__playback_segment_size_time_at_buffer = segment_size_time_at_buffer
+        self.__playback_segment_size_time_at_buffer = as_view(segment_size_time_at_buffer)
 
     def get_playback_segment_size_time_at_buffer(self):
         """
-        It returns a list of the time each segment size spends
-        in the buffer before was played by the player. The list
+        It returns a view of the time each segment size spends
+        in the buffer before was played by the player. The view
         will increase over time. It is ordered from the oldest
         segment until de newest one (from the begging until the
         end of the reproduced video).
         """
-        pos = 0
+        return self.__playback_segment_size_time_at_buffer
 
-        try:
-            pos = [x[1] for x in self.__playback_segment_size_time_at_buffer].index(-1, max(len(self.__partial_sstb) - 1, 0))
-        except:
-            pos = len(self.__playback_segment_size_time_at_buffer)
+    def get_buffer(self):
+        """
+        It returns the QI of each segment in the __buffer not played yet, from the oldest one.
+        It is a copy, but no longer than the __buffer itself.
+        """
+        if self.__buffer is None:
+            return ()
 
-        plist = [round(x[1] - x[0], 6) for x in self.__playback_segment_size_time_at_buffer[len(self.__partial_sstb):pos]]
-        self.__partial_sstb = self.__partial_sstb + plist
+        return self.__buffer.get_qi_list()
 
-        return tuple(self.__partial_sstb)
+    def get_amount_video_to_play(self):
+        """
+        It returns the total amount of video stored in the __buffer that still will be played,
+        at the current time.
+        """
+        if self.__timer is None:
+            return self.__playback_clock.buffer_level
 
-    def get_buffer(self):
-        return tuple(self.__buffer)
+        return self.__playback_clock.get_level(self.__timer.get_current_time())
 
-    def get_amount_video_to_play(self):
+    def get_playback_snapshot(self):
         """
-        It returns the total amount of video stored in the __buffer that still will be played
+        It returns the last PlaybackSnapshot of the Player: (version, time,
+        buffer_level, playing, last_qi, last_pause, last_throughput). It is
+        consistent even if it is read from another thread.
         """
-        return self.__amount_video_to_play
+        return self.__playback_snapshot
+
+    def get_qoe(self):
+        """
+        It returns a dict with the current QoE metrics of the playback (average
+        bitrate, switches, startup delay, rebuffering and the QoE score), see
+        player/qoe.py. They are updated at each played second, stall and segment.
+        """
+        if self.__qoe is None:
+            return {}
+
+        return self.__qoe.get_metrics()
+
+    def get_last_throughput(self):
+        """
+        It returns the throughput (bps) of the last segment downloaded, or None before the first one.
+        """
+        if self.__throughput_estimators is None:
+            return None
+
+        return self.__throughput_estimators.last
+
+    def get_throughput_mean(self):
+        """
+        It returns the mean throughput (bps) of the last 'throughput_window' segments.
+        """
+        if self.__throughput_estimators is None:
+            return None
+
+        return self.__throughput_estimators.window.get_mean()
+
+    def get_throughput_harmonic_mean(self):
+        """
+        It returns the harmonic mean throughput (bps) of the last 'throughput_window'
+        segments, less optimistic than the mean about a single fast download.
+        """
+        if self.__throughput_estimators is None:
+            return None
+
+        return self.__throughput_estimators.window.get_harmonic_mean()
+
+    def get_throughput_ewma(self):
+        """
+        It returns the EWMA of the throughput (bps), the weight of a sample halves
+        after 'throughput_half_life' seconds of download.
+        """
+        if self.__throughput_estimators is None:
+            return None
+
+        return self.__throughput_estimators.ewma.get_estimate()
+
+    def get_throughput_quantile(self, p):
+        """
+        It returns the p quantile of the throughput (bps) of every segment, p
+        must be one of the 'throughput_quantiles' parameter.
+        """
+        if self.__throughput_estimators is None:
+            return None
+
+        return self.__throughput_estimators.get_quantile(p)
 
     def get_max_buffer_size(self):
         """
@@ -95,33 +224,33 @@ class Whiteboard:
 
     def get_playback_qi(self):
         """
-        It returns a tuples list of time and QI's segments already played by the Player.
+        It returns a view of (time, QI) tuples of the segments already played by the Player.
         The time represents the moment when a QI segment was consumed (played) by the Player.
         """
-        return tuple(self.__playback_qi)
+        return self.__playback_qi
 
     def get_playback_pauses(self):
         """
-        It returns a tuples list of time and pauses happened during the playing of
+        It returns a view of (time, pause) tuples of the pauses happened during the playing of
         the video. The time (s) represents the moment when a video pause occurred and
         the pauses represents the lenght of this pauses.
         """
 
-        return tuple(self.__playback_pauses)
+        return self.__playback_pauses
 
     def get_playback_buffer_size(self):
         """
-        It returns a tuples list of time and __buffer size during the playing video.
+        It returns a view of (time, __buffer size) tuples during the playing video.
         The time represents the moment when the __buffer size was measured.
         """
 
-        return tuple(self.__playback_buffer_size)
+        return self.__playback_buffer_size
 
     def get_playback_history(self):
         """
-        It returns a tuples list of time and __playback history happened during
+        It returns a view of (time, __playback) tuples of the history happened during
         the playing video. The time represents the moment when was measured the possible
         to play or not the video. For __playback, the number one means it was possible to
         play and zero is otherwise.
         """
-        return tuple(self.__playback)
+        return self.__playback
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+A minimal HTTP/1.1 client over asyncio non-blocking sockets, used by
+the ConnectionHandler when the client runs in the asyncio runtime.
+Like ConnectionPool, it keeps persistent connections for each host.
+"""
+
+import asyncio
+import time
+
+
+async def read_response_head(reader):
+    """
+    Reads the status line and the headers, returning a (status, headers) tuple.
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed by the server')
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, value = line.decode('latin-1').split(':', 1)
+        headers[key.strip().lower()] = value.strip()
+
+    return status, headers
+
+
+async def deliver_chunk(on_chunk, data):
+    # on_chunk may ask to wait before the next chunk is read
+    waiting_time = on_chunk(data)
+    if waiting_time:
+        await asyncio.sleep(waiting_time)
+
+
+async def read_response_body(reader, headers, chunk_size, on_chunk):
+    """
+    Reads the body, chunk_size bytes at most at a time, calling on_chunk(data)
+    for each piece. on_chunk may return how many seconds to wait before
+    reading the next piece. It returns the body length.
+    """
+    length = 0
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            remaining = int((await reader.readline()).split(b';')[0], 16)
+            if remaining == 0:
+                await reader.readline()
+                break
+            while remaining > 0:
+                data = await reader.readexactly(min(chunk_size, remaining))
+                remaining -= len(data)
+                length += len(data)
+                await deliver_chunk(on_chunk, data)
+            await reader.readline()
+    elif 'content-length' in headers:
+        remaining = int(headers['content-length'])
+        while remaining > 0:
+            data = await reader.readexactly(min(chunk_size, remaining))
+            remaining -= len(data)
+            length += len(data)
+            await deliver_chunk(on_chunk, data)
+    else:
+        headers['connection'] = 'close'
+        while True:
+            data = await reader.read(chunk_size)
+            if not data:
+                break
+            length += len(data)
+            await deliver_chunk(on_chunk, data)
+
+    return length
+
+
+class AsyncConnectionPool:
+
+    def __init__(self, pool_size):
+        self.pool_size = pool_size
+        # (host_name, port) -> list of idle (reader, writer) streams
+        self.idle_connections = {}
+
+    async def open_connection(self, host_name, port):
+        """
+        It returns a ((reader, writer), connect_time) tuple.
+        """
+        started_at = time.perf_counter()
+        streams = await asyncio.open_connection(host_name, int(port))
+        return streams, time.perf_counter() - started_at
+
+    def release(self, host_name, port, streams):
+        idle = self.idle_connections.setdefault((host_name, port), [])
+        if len(idle) < self.pool_size:
+            idle.append(streams)
+            return
+
+        streams[1].close()
+
+    async def stream(self, host_name, port, path_name, chunk_size, on_chunk, headers=None, response_headers=None):
+        """
+        Sends a GET request and reads the response body chunk by chunk,
+        calling on_chunk(data) for each one, which may return how many
+        seconds to wait before the next one is read. It returns a (status, length,
+        connect_time, ttfb) tuple, connect_time is 0 if an idle connection
+        was reused and ttfb is the time until the response head arrived.
+        If response_headers is given, the response headers are stored in it.
+        """
+        request = f'GET {path_name} HTTP/1.1\r\nHost: {host_name}\r\n'
+        for key, value in (headers or {}).items():
+            request += f'{key}: {value}\r\n'
+        request = (request + '\r\n').encode()
+
+        while True:
+            idle = self.idle_connections.get((host_name, port), [])
+            reused = bool(idle)
+            connect_time = 0
+
+            if reused:
+                streams = idle.pop()
+            else:
+                streams, connect_time = await self.open_connection(host_name, port)
+
+            reader, writer = streams
+            try:
+                started_at = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                status, headers_received = await read_response_head(reader)
+                ttfb = time.perf_counter() - started_at
+                break
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+
+                # a brand new connection failing is a real problem
+                if not reused:
+                    raise
+            except BaseException:
+                # e.g. cancelled, the response would still come on this connection
+                writer.close()
+                raise
+
+        try:
+            length = await read_response_body(reader, headers_received, chunk_size, on_chunk)
+        except BaseException:
+            # the rest of the response is still on the way (e.g. the download was abandoned)
+            writer.close()
+            raise
+
+        if headers_received.get('connection', '').lower() == 'close':
+            writer.close()
+        else:
+            self.release(host_name, port, streams)
+
+        if response_headers is not None:
+            response_headers.update(headers_received)
+
+        return status, length, connect_time, ttfb
+
+    async def get(self, host_name, port, path_name, headers=None):
+        """
+        It returns a (status, body, connect_time) tuple.
+        """
+        body = bytearray()
+        status, _, connect_time, _ = await self.stream(host_name, port, path_name, 65536, body.extend, headers)
+        return status, bytes(body), connect_time
+
+    def close_all(self):
+        for idle in self.idle_connections.values():
+            for _, writer in idle:
+                writer.close()
+        self.idle_connections = {}
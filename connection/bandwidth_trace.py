@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+Trace-driven link capacity. A bandwidth trace is a numpy .npy file
+with a single float array: the capacity (bps) measured in each step
+of the trace. The file is memory mapped, so only the pages that are
+really read are loaded, and the capacity at a time t is found by
+indexing the array.
+
+Text traces (one value per line) are converted by convert_trace.py,
+which also rejects the samples a transfer might never finish with.
+"""
+
+import numpy as np
+
+from connection.traffic_shaper import TrafficShaper, get_index, get_next_boundary
+
+# traces already mapped by this process, by file name
+loaded_traces = {}
+
+
+def load_bandwidth_trace(file_name):
+    """
+    It returns the samples of the trace, memory mapped (read only).
+    """
+    if file_name not in loaded_traces:
+        samples = np.load(file_name, mmap_mode='r')
+        if samples.ndim != 1 or len(samples) == 0:
+            raise ValueError(f'{file_name} is not a bandwidth trace')
+
+        loaded_traces[file_name] = samples
+
+    return loaded_traces[file_name]
+
+
+def save_bandwidth_trace(file_name, samples):
+    np.save(file_name, np.asarray(samples, dtype='<f8'))
+
+
+class BandwidthTrace(TrafficShaper):
+
+    def __init__(self, samples, step=1, offset=0, scale=1, loop=True):
+        self.samples = samples
+        # seconds covered by each sample
+        self.step = step
+        # the session starts offset seconds inside the trace
+        self.offset = offset
+        # the samples are multiplied by scale (e.g. 1000 for kbps traces)
+        self.scale = scale
+        # after the last sample the trace starts over, otherwise the last one is kept
+        self.loop = loop
+
+        # a transfer would never finish on a link that stays at 0 bps
+        if step <= 0 or scale <= 0:
+            raise ValueError('traffic_trace_step and traffic_trace_scale parameters should be positive')
+        if not loop and not samples[-1] > 0:
+            raise ValueError('the last sample of a bandwidth trace that doesn\'t loop should be positive')
+
+    def get_position(self, t):
+        position = get_index(t, self.step, self.offset)
+        if self.loop:
+            return position % len(self.samples)
+
+        return min(position, len(self.samples) - 1)
+
+    def get_positions(self, t):
+        """
+        It returns the (profile, value position) in use at the time t.
+        A trace has a single profile.
+        """
+        return 0, self.get_position(t)
+
+    def get_rate(self, t):
+        return float(self.samples[self.get_position(t)]) * self.scale
+
+    def get_next_change(self, t):
+        return get_next_boundary(t, self.step, self.offset)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+Helpers for HTTP Range requests, used by the ConnectionHandler to
+fetch a large segment in several parts over parallel connections.
+"""
+
+
+def get_range_header(start, end):
+    """
+    It returns the Range header of the bytes from start to end (exclusive).
+    """
+    return {'Range': f'bytes={start}-{end - 1}'}
+
+
+def get_total_length(response_headers):
+    """
+    It returns the full length of the resource of a 206 response, given
+    by its Content-Range header, or None if it is unknown.
+    """
+    content_range = response_headers.get('content-range', '')
+    total_length = content_range.rpartition('/')[2]
+
+    return int(total_length) if total_length.isdigit() else None
+
+
+def split_range(start, end, parts):
+    """
+    It returns a list of (start, end) ranges, end exclusive, splitting
+    the bytes from start to end in parts of about the same length.
+    """
+    parts = max(1, min(parts, end - start))
+    step, remainder = divmod(end - start, parts)
+
+    ranges = []
+    for i in range(parts):
+        length = step + (1 if i < remainder else 0)
+        ranges.append((start, start + length))
+        start += length
+
+    return ranges
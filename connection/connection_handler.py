@@ -4,45 +4,87 @@
 
 @description: PyDash Project
 
-The ConnectionHandler is a Singleton class implementation
-
 The class responsible to retrieve segments in the web server.
 Also it implements a traffic shaping approach.
+
+In the asyncio runtime the transfers are tasks over non-blocking
+sockets, and the response is handled when the task is concluded.
+
+The requests reuse persistent connections, see ConnectionPool. The
+segments are read in chunks, and the time and length of each chunk are
+recorded in the SSMessage (see get_throughput_samples()).
+
+Segments larger than 'range_threshold' bytes may be fetched as
+'range_requests' HTTP Range requests over parallel connections, see
+fetch_ranges(). The chunks of every range are recorded in the same
+SSMessage, so the R2A still gets one throughput sample per segment.
+
+After each chunk, the abandonment policy of the R2A (see
+IR2A.should_abandon()) may cancel the download, and the segment is
+requested again with a lower quality_id, see abandon_segment().
+
+The traffic shaping is a TokenBucket that paces the chunk reads, see
+TrafficShaper for the link capacity model. When the 'traffic_trace'
+parameter is set, the capacity is replayed from a bandwidth trace
+instead (see BandwidthTrace). A transfer that didn't happen in real
+time waits one 'traffic_shaping_rtt' for its first byte, so even a
+burst taken from the bucket doesn't take zero time.
 """
 
 from base.simple_module import SimpleModule
 from base.message import Message, MessageKind, SSMessage
-from base.configuration_parser import ConfigurationParser
+from connection.byte_range import get_range_header, get_total_length, split_range
+from connection.connection_pool import ConnectionPool
+from connection.traffic_shaper import TokenBucket, TrafficShaper
 from player.parser import *
-import http.client
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+import threading
 import time
-from scipy.stats import expon
-from base.timer import Timer
-import seaborn as sns
-import matplotlib.pyplot as plt
+
+
+class SegmentAbandoned(Exception):
+    """
+    Raised during a download abandoned by the R2A policy.
+    """
+
+    def __init__(self, quality_id, received_length, abandoned_at):
+        Exception.__init__(self, f'abandoned after {received_length} bytes, new quality_id: {quality_id}')
+        self.quality_id = quality_id
+        self.received_length = received_length
+        self.abandoned_at = abandoned_at
 
 
 class ConnectionHandler(SimpleModule):
 
-    def __init__(self, id):
-        SimpleModule.__init__(self, id)
+    def __init__(self, id, session=None):
+        SimpleModule.__init__(self, id, session)
         self.initial_time = 0
         self.qi = []
 
         # for traffic shaping
-        config_parser = ConfigurationParser.get_instance()
+        config_parser = self.session.config_parser
         self.traffic_shaping_interval = int(config_parser.get_parameter('traffic_shaping_profile_interval'))
+        self.traffic_shaping_value_interval = float(config_parser.get_parameter('traffic_shaping_value_interval'))
         self.traffic_shaping_seed = int(config_parser.get_parameter('traffic_shaping_seed'))
+        self.traffic_shaping_bucket_size = 8 * int(config_parser.get_parameter('traffic_shaping_bucket_size'))
+        # seconds until the first byte of a simulated transfer, at least the Timer resolution
+        self.traffic_shaping_rtt = float(config_parser.get_parameter('traffic_shaping_rtt'))
+        if self.traffic_shaping_rtt < 1e-6:
+            raise ValueError('traffic_shaping_rtt parameter should be at least 0.000001 (s)')
         self.traffic_shaping_values = []
 
-        # mark the current traffic shapping interval
-        self.current_traffic_shaping_interval = 0
+        # a bandwidth trace replaces the L/M/H profiles when it is set
+        self.traffic_trace = config_parser.get_parameter('traffic_trace')
+        self.traffic_trace_step = float(config_parser.get_parameter('traffic_trace_step'))
+        self.traffic_trace_offset = float(config_parser.get_parameter('traffic_trace_offset'))
+        self.traffic_trace_scale = float(config_parser.get_parameter('traffic_trace_scale'))
+        self.traffic_trace_loop = config_parser.get_boolean_parameter('traffic_trace_loop')
 
         self.traffic_shaping_sequence = []
-        # traffic shaping sequence position
-        self.tss_position = 0
-        # traffic shaping values position
-        self.tsv_position = 0
+
+        # both are built when the qi list is known
+        self.traffic_shaper = None
+        self.token_bucket = None
 
         token = config_parser.get_parameter('traffic_shaping_profile_sequence')
         for i in range(len(token)):
@@ -53,52 +95,159 @@ class ConnectionHandler(SimpleModule):
             elif token[i] == 'H':
                 self.traffic_shaping_sequence.append(2)
 
-        self.timer = Timer.get_instance()
+        self.timer = self.session.timer
+        self.asynchronous = config_parser.get_parameter('runtime') == 'asyncio'
 
-    def get_traffic_shaping_positions(self):
-        current_tsi = self.timer.get_current_time() // self.traffic_shaping_interval
+        # persistent connections kept by host
+        pool_size = int(config_parser.get_parameter('connection_pool_size'))
+        if self.asynchronous:
+            # asyncio is only imported by the asyncio runtime, it is slow to load
+            from connection.async_http import AsyncConnectionPool
 
-        if current_tsi > self.current_traffic_shaping_interval:
-            self.current_traffic_shaping_interval = current_tsi
-            self.tss_position = (self.tss_position + 1) % len(self.traffic_shaping_sequence)
+            self.connection_pool = AsyncConnectionPool(pool_size)
+        else:
+            self.connection_pool = ConnectionPool(pool_size)
 
-        self.tsv_position = (self.tsv_position + 1) % len(self.traffic_shaping_values[0])
+        # segments are read chunk_size bytes at a time into the same buffer
+        self.chunk_size = int(config_parser.get_parameter('chunk_size'))
+        self.chunk_buffer = bytearray(self.chunk_size)
 
-        return (self.tss_position, self.tsv_position)
+        # large segments are split in range_requests parallel requests (1 disables it)
+        self.range_requests = int(config_parser.get_parameter('range_requests'))
+        self.range_threshold = int(config_parser.get_parameter('range_threshold'))
+        # the ranges are read by several threads, all of them shaped by the same bucket
+        self.shaping_lock = threading.Lock()
 
     def initialize(self):
         # self.send_down(Message(MessageKind.SEGMENT_REQUEST, 'Olá Mundo'))
 
         pass
 
-    def bandwidth_limitation(self, package_size=0):
-        if package_size == 0:
+    def shape_chunk(self, msg, chunk_length, cancelled=None):
+        """
+        Called after each chunk of a real transfer. It records the chunk
+        and returns how long the reading must wait to keep the transfer
+        inside the link capacity. It raises CancelledError, and the chunk
+        isn't recorded, once the cancelled event (if any) is set.
+        """
+        # a virtual clock doesn't move during the transfer, see shape_transfer()
+        if self.timer.is_virtual():
+            return 0
+
+        with self.shaping_lock:
+            # set under the lock, so no chunk is recorded after the cancellation
+            if cancelled is not None and cancelled.is_set():
+                raise CancelledError()
+
+            current_time = self.timer.get_current_time()
+            if msg.get_received_length() == 0:
+                # the first chunk waits for the transfers ahead of it on the link
+                msg.add_transfer_started_at(msg.get_download_started_at() +
+                                            self.token_bucket.get_waiting_time(current_time))
+
+            waiting_time = self.token_bucket.consume(current_time, 8 * chunk_length)
+            msg.add_chunk(current_time + waiting_time, chunk_length)
+
+        self.check_abandonment(msg, current_time)
+        return waiting_time
+
+    def shape_transfer(self, msg, length):
+        """
+        Simulates, chunk by chunk, the shaped transfer of length bytes
+        requested at msg download_started_at, when the transfer didn't happen in real
+        time (virtual clock or offline mode). It records the chunks in msg
+        and returns the transfer time, never less than one round trip. It
+        raises SegmentAbandoned if the R2A policy abandons the download.
+        """
+        msg.clear_chunks()
+
+        # other segments may be requested while this one is downloading,
+        # its first byte waits for them, the round trip doesn't
+        started_at = msg.get_download_started_at()
+        t = started_at + self.traffic_shaping_rtt
+        t += self.token_bucket.get_waiting_time(t)
+        msg.add_ttfb(t - started_at)
+        msg.add_transfer_started_at(t - self.traffic_shaping_rtt)
+        received = 0
+        while received < length:
+            chunk_length = min(self.chunk_size, length - received)
+            received += chunk_length
+            t += self.token_bucket.consume(t, 8 * chunk_length)
+            msg.add_chunk(t, chunk_length)
+
+            if received < length:
+                self.check_abandonment(msg, t)
+
+        return t - started_at
+
+    def get_buffer_level(self, msg, t):
+        """
+        Seconds of video in the buffer at the time t of the download of msg.
+        The Whiteboard snapshot has the level at the time it was taken: the
+        video played since then is discounted, unless the video isn't being
+        played (buffering or paused). During a real transfer the scheduler
+        is blocked, so no new snapshot is taken. The snapshot may be read
+        from the threads of the range requests, it is consistent without a lock.
+        """
+        snapshot = self.session.whiteboard.get_playback_snapshot()
+        if not snapshot.playing:
+            return snapshot.buffer_level
+
+        return max(0, snapshot.buffer_level - (t - snapshot.time))
+
+    def check_abandonment(self, msg, t):
+        """
+        Asks the abandonment policy of msg, if any, whether the download
+        must go on at the time t. It raises SegmentAbandoned otherwise.
+        """
+        abandonment_policy = msg.get_abandonment_policy()
+        if abandonment_policy is None:
             return
 
-        tsp = self.get_traffic_shaping_positions()
-        target_throughput = self.traffic_shaping_values[self.traffic_shaping_sequence[tsp[0]]][tsp[1]]
-
-        print(f'Execution Time {self.timer.get_current_time()} > target throughput: {target_throughput} - profile: ({self.traffic_shaping_sequence[tsp[0]]}, {tsp[1]})')
-
-        rtt = time.perf_counter() - self.initial_time
-        throughput = package_size / rtt
-
-        # we didn't pass our throughput go
-        if target_throughput >= throughput:
-            return
-
-        waiting_time = (package_size - (target_throughput * rtt)) / target_throughput
-        time.sleep(waiting_time)
+        received_length = msg.get_received_length()
+        quality_id = abandonment_policy(msg, received_length, t - msg.get_transfer_started_at(), self.get_buffer_level(msg, t))
+
+        # only a lower quality_id is accepted, so a segment isn't abandoned forever
+        if quality_id is not None and quality_id < msg.get_quality_id():
+            raise SegmentAbandoned(quality_id, received_length, t)
+
+    def abandon_segment(self, msg, abandoned):
+        """
+        Records the abandoned download in msg and requests the segment
+        again, with the new quality_id, at the time it was abandoned.
+        """
+        print(f'Execution Time {abandoned.abandoned_at} > abandoned: {msg} - {abandoned}')
+
+        msg.add_abandonment(abandoned.abandoned_at, msg.get_quality_id(), abandoned.quality_id, abandoned.received_length)
+        msg.add_quality_id(abandoned.quality_id)
+        msg.add_bit_length(0)
+        msg.clear_chunks()
+        msg.set_kind(MessageKind.SEGMENT_REQUEST)
+
+        self.schedule_at(msg, abandoned.abandoned_at)
+
+    def transfer_time(self, package_size):
+        """
+        Time spent by a transfer of package_size bits requested now, one
+        round trip and the bits at the link capacity. It doesn't touch the
+        token bucket.
+        """
+        first_byte_at = self.timer.get_current_time() + self.traffic_shaping_rtt
+        return self.traffic_shaping_rtt + self.traffic_shaper.get_finish_time(first_byte_at, package_size) - first_byte_at
+
+    def print_target_throughput(self):
+        current_time = self.timer.get_current_time()
+        profile, position = self.traffic_shaper.get_positions(current_time)
+        print(f'Execution Time {current_time} > target throughput: {self.traffic_shaper.get_rate(current_time)} - profile: ({profile}, {position})')
 
     def finalization(self):
-        pass
-
+        self.connection_pool.close_all()
 
     def handle_xml_request(self, msg):
         if not 'http://' in msg.get_payload():
             raise ValueError('url_mpd parameter should starts with http://')
 
-        self.initial_time = time.perf_counter()
+        self.initial_time = self.timer.get_current_time()
 
         url_tokens = msg.get_payload().split('/')[2:]
         port = '80'
@@ -106,74 +255,278 @@ class ConnectionHandler(SimpleModule):
         path_name = '/' + '/'.join(url_tokens[1:])
         mdp_file = ''
 
+        if self.asynchronous:
+            self.scheduler.add_task(self.handle_xml_request_async(msg, host_name, port, path_name))
+            return
+
+        started_at = time.perf_counter()
+
+        try:
+            result = self.connection_pool.get(host_name, port, path_name)
+        except Exception as err:
+            result = err
+
+        self.handle_xml_result(msg, started_at, result)
+
+    async def handle_xml_request_async(self, msg, host_name, port, path_name):
+        started_at = time.perf_counter()
+
         try:
-            connection = http.client.HTTPConnection(host_name, port)
-            connection.request('GET', path_name)
-            mdp_file = connection.getresponse().read().decode()
-            connection.close()
+            result = await self.connection_pool.get(host_name, port, path_name)
         except Exception as err:
-            print('> Houston, we have a problem!')
-            print(f'> trying to connecto to: {msg.get_payload()}')
-            print(err)
-            exit(-1)
+            result = err
+
+        self.handle_xml_result(msg, started_at, result)
+
+    def report_request_error(self, msg, err):
+        print('> Houston, we have a problem!')
+        print(f'> trying to connecto to: {msg.get_payload()}')
+        print(err)
+        exit(-1)
+
+    def handle_xml_result(self, msg, started_at, result):
+        """
+        Handles the (status, body, connect_time) of the MPD request started
+        at started_at (perf_counter), or the error it raised. It is the same
+        for both runtimes.
+        """
+        if isinstance(result, Exception):
+            self.report_request_error(msg, result)
+
+        _, mdp_file, connect_time = result
+        self.handle_xml_content(mdp_file.decode(), connect_time, time.perf_counter() - started_at - connect_time)
 
+    def handle_xml_content(self, mdp_file, connect_time, transfer_time):
         msg = Message(MessageKind.XML_RESPONSE, mdp_file)
         msg.add_bit_length(8 * len(mdp_file))
+        msg.add_connect_time(connect_time)
+        msg.add_transfer_time(transfer_time)
 
         parsed_mpd = parse_mpd(msg.get_payload())
         self.qi = parsed_mpd.get_qi()
 
+        self.traffic_shaper = self.build_traffic_shaper()
+        self.token_bucket = TokenBucket(self.traffic_shaper, self.traffic_shaping_bucket_size)
+
+        delay = 0
+        if self.timer.is_virtual():
+            delay = self.transfer_time(msg.get_bit_length())
+
+        self.send_up(msg, delay)
+
+    def build_traffic_shaper(self):
+        # numpy is only imported here, it is slow to load
+        if self.traffic_trace:
+            from connection.bandwidth_trace import BandwidthTrace, load_bandwidth_trace
+
+            return BandwidthTrace(load_bandwidth_trace(self.traffic_trace), self.traffic_trace_step,
+                                  self.traffic_trace_offset, self.traffic_trace_scale, self.traffic_trace_loop)
+
+        from numpy.random import RandomState
+
         increase_factor = 1
         low = round(self.qi[len(self.qi) - 1] * increase_factor)
         medium = round(self.qi[(len(self.qi) // 2) - 1] * increase_factor)
         high = round(self.qi[0] * increase_factor)
 
-        self.traffic_shaping_values.append(
-            expon.rvs(scale=1, loc=low, size=1000, random_state=self.traffic_shaping_seed))
-        self.traffic_shaping_values.append(
-            expon.rvs(scale=1, loc=medium, size=1000, random_state=self.traffic_shaping_seed))
-        self.traffic_shaping_values.append(
-            expon.rvs(scale=1, loc=high, size=1000, random_state=self.traffic_shaping_seed))
+        # the same values of scipy expon.rvs(scale=1, loc=..., size=1000, random_state=seed),
+        # without the (much slower) scipy.stats import
+        exponential = RandomState(self.traffic_shaping_seed).standard_exponential(1000)
 
-        self.send_up(msg)
+        self.traffic_shaping_values.append(exponential + low)
+        self.traffic_shaping_values.append(exponential + medium)
+        self.traffic_shaping_values.append(exponential + high)
+
+        return TrafficShaper(self.traffic_shaping_values, self.traffic_shaping_sequence,
+                             self.traffic_shaping_interval, self.traffic_shaping_value_interval)
 
     def handle_segment_size_request(self, msg):
         port = '80'
         host_name = msg.get_host_name()
         path_name = msg.get_url()
-        ss_file = ''
-        self.initial_time = time.perf_counter()
+        self.initial_time = self.timer.get_current_time()
+        msg.add_download_started_at(self.initial_time)
+        msg.add_transfer_started_at(self.initial_time)
 
         print(f'Execution Time {self.timer.get_current_time()} > selected QI: {self.qi.index(msg.get_quality_id())}')
+        self.print_target_throughput()
+
+        if self.asynchronous:
+            self.scheduler.add_task(self.handle_segment_size_request_async(msg, host_name, port, path_name))
+            return
+
+        started_at = time.perf_counter()
 
         try:
-            connection = http.client.HTTPConnection(host_name, port)
-            connection.request('GET', path_name)
-            ss_file = connection.getresponse().read()
-            connection.close()
+            if self.range_requests > 1:
+                result = self.fetch_ranges(msg, host_name, port, path_name)
+            else:
+                result = self.connection_pool.stream(
+                    host_name, port, path_name, self.chunk_buffer, lambda chunk_length: self.shape_chunk(msg, chunk_length))
         except Exception as err:
-            print('> Houston, we have a problem!')
-            print(f'> trying to connecto to: {msg.get_payload()}')
-            print(err)
-            exit(-1)
+            result = err
 
+        self.handle_segment_size_result(msg, started_at, result)
 
-        msg.set_kind(MessageKind.SEGMENT_RESPONSE)
+    async def handle_segment_size_request_async(self, msg, host_name, port, path_name):
+        started_at = time.perf_counter()
 
-        decoded = False
+        try:
+            if self.range_requests > 1:
+                result = await self.fetch_ranges_async(msg, host_name, port, path_name)
+            else:
+                result = await self.connection_pool.stream(
+                    host_name, port, path_name, self.chunk_size, lambda data: self.shape_chunk(msg, len(data)))
+        except Exception as err:
+            result = err
+
+        self.handle_segment_size_result(msg, started_at, result)
+
+    def handle_segment_size_result(self, msg, started_at, result):
+        """
+        Handles the (status, length, connect_time, ttfb) of the segment
+        request started at started_at (perf_counter), or the error it
+        raised. It is the same for both runtimes.
+        """
+        if isinstance(result, SegmentAbandoned):
+            self.abandon_segment(msg, result)
+            return
+        if isinstance(result, Exception):
+            self.report_request_error(msg, result)
+
+        status, length, connect_time, ttfb = result
+        msg.add_connect_time(connect_time)
+        msg.add_ttfb(connect_time + ttfb)
+        msg.add_transfer_time(time.perf_counter() - started_at - connect_time)
+        self.handle_segment_size_content(msg, status, length)
+
+    def fetch_ranges(self, msg, host_name, port, path_name):
+        """
+        Fetches the first range_threshold bytes of the segment and, if it
+        is larger than that, the rest of it split in range_requests - 1
+        ranges read by parallel connections. It returns the (status, length,
+        connect_time, ttfb) of the whole segment. If one of the ranges fails
+        (e.g. the download is abandoned), the error goes on right away and
+        the other ranges stop at their next chunk, so they don't keep
+        shaping chunks into msg while it is requested again.
+        """
+        response_headers = {}
+        status, length, connect_time, ttfb = self.connection_pool.stream(
+            host_name, port, path_name, self.chunk_buffer, lambda chunk_length: self.shape_chunk(msg, chunk_length),
+            get_range_header(0, self.range_threshold), response_headers)
+
+        ranges = self.get_remaining_ranges(status, length, response_headers)
+        if not ranges:
+            return self.get_ranges_status(status), length, connect_time, ttfb
+
+        cancelled = threading.Event()
+
+        def fetch_range(byte_range):
+            return self.connection_pool.stream(
+                host_name, port, path_name, bytearray(self.chunk_size),
+                lambda chunk_length: self.shape_chunk(msg, chunk_length, cancelled), get_range_header(*byte_range))
+
+        executor = ThreadPoolExecutor(len(ranges))
+        futures = [executor.submit(fetch_range, byte_range) for byte_range in ranges]
+        try:
+            # the first error is raised as soon as it happens
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            with self.shaping_lock:
+                cancelled.set()
+            raise
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results = [future.result() for future in futures]
+        return self.merge_ranges(path_name, length, connect_time, ttfb, ranges, results)
+
+    async def fetch_ranges_async(self, msg, host_name, port, path_name):
+        """
+        The same as fetch_ranges(), the ranges are concurrent tasks. If one
+        of them fails (e.g. the download is abandoned), the others are
+        cancelled before the error goes on, so they don't keep shaping
+        chunks into msg while it is requested again.
+        """
+        import asyncio
+
+        response_headers = {}
+        status, length, connect_time, ttfb = await self.connection_pool.stream(
+            host_name, port, path_name, self.chunk_size, lambda data: self.shape_chunk(msg, len(data)),
+            get_range_header(0, self.range_threshold), response_headers)
+
+        ranges = self.get_remaining_ranges(status, length, response_headers)
+        if not ranges:
+            return self.get_ranges_status(status), length, connect_time, ttfb
+
+        tasks = [asyncio.ensure_future(self.connection_pool.stream(
+            host_name, port, path_name, self.chunk_size, lambda data: self.shape_chunk(msg, len(data)),
+            get_range_header(*byte_range))) for byte_range in ranges]
 
         try:
-            ss_file = ss_file.decode()
-        except UnicodeDecodeError:
-            # if wasn't possible to decode() is a ss
-            msg.add_bit_length(8 * len(ss_file))
-            self.bandwidth_limitation(msg.get_bit_length())
-            decoded = True
-
-        if not decoded and '404 Not Found' in ss_file:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return self.merge_ranges(path_name, length, connect_time, ttfb, ranges, results)
+
+    def get_remaining_ranges(self, status, length, response_headers):
+        """
+        It returns the ranges still missing after the first one, or an
+        empty list if the segment is already complete.
+        """
+        total_length = get_total_length(response_headers)
+        if status != 206 or total_length is None or total_length <= length:
+            return []
+
+        return split_range(length, total_length, self.range_requests - 1)
+
+    def get_ranges_status(self, status):
+        # a segment completed by range requests is as good as a 200 response
+        return 200 if status == 206 else status
+
+    def merge_ranges(self, path_name, length, connect_time, ttfb, ranges, results):
+        """
+        Puts the first range and the parallel ones back together. The
+        connections of the parallel ranges are opened at the same time,
+        so only the slowest one adds to connect_time.
+        """
+        for (start, end), (status, range_length, _, _) in zip(ranges, results):
+            if status != 206 or range_length != end - start:
+                raise ValueError(f'{path_name}: range {start}-{end - 1} came back with status {status} and {range_length} bytes')
+
+            length += range_length
+
+        connect_time += max(result[2] for result in results)
+
+        return 200, length, connect_time, ttfb
+
+    def handle_segment_size_content(self, msg, status, length):
+        msg.set_kind(MessageKind.SEGMENT_RESPONSE)
+        delay = 0
+
+        if status == 200 and length > 0:
+            msg.add_bit_length(8 * length)
+
+            # a real transfer was already shaped while it happened
+            if self.timer.is_virtual():
+                try:
+                    delay = self.shape_transfer(msg, length)
+                except SegmentAbandoned as abandoned:
+                    self.abandon_segment(msg, abandoned)
+                    return
+        else:
             msg.set_found(False)
 
-        self.send_up(msg)
+            if self.timer.is_virtual():
+                # the error page also takes some time to arrive
+                delay = self.transfer_time(8 * length)
+
+        self.send_up(msg, delay)
 
     def handle_segment_size_response(self, msg):
         pass
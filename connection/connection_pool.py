@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+A per-host pool of persistent HTTP/1.1 connections. It keeps up to
+pool_size idle connections for each host, so consecutive segment
+requests don't pay a new TCP handshake (and slow-start) each time.
+
+The time spent to open a connection is reported apart from the
+request itself, so it doesn't disguise the measured throughput.
+"""
+
+import http.client
+import threading
+import time
+
+
+class ConnectionPool:
+
+    def __init__(self, pool_size):
+        self.pool_size = pool_size
+        # (host_name, port) -> list of idle connections
+        self.idle_connections = {}
+        self.lock = threading.Lock()
+
+    def get_idle_connection(self, host_name, port):
+        with self.lock:
+            idle = self.idle_connections.get((host_name, port), [])
+            if idle:
+                return idle.pop()
+
+        return None
+
+    def open_connection(self, host_name, port):
+        """
+        It returns a (connection, connect_time) tuple.
+        """
+        connection = http.client.HTTPConnection(host_name, port)
+        started_at = time.perf_counter()
+        connection.connect()
+        return connection, time.perf_counter() - started_at
+
+    def release(self, host_name, port, connection):
+        """
+        Gives back a connection whose response was completely read.
+        """
+        with self.lock:
+            idle = self.idle_connections.setdefault((host_name, port), [])
+            if len(idle) < self.pool_size:
+                idle.append(connection)
+                return
+
+        connection.close()
+
+    def discard(self, connection):
+        connection.close()
+
+    def request(self, host_name, port, path_name, headers=None, method='GET'):
+        """
+        Sends a GET (or method) request and returns a (connection, response, connect_time)
+        tuple, connect_time is 0 if an idle connection was reused. The
+        response must be read and the connection released (or discarded)
+        by the caller. An idle connection closed meanwhile by the server
+        is replaced by another one.
+        """
+        while True:
+            connection = self.get_idle_connection(host_name, port)
+            reused = connection is not None
+            connect_time = 0
+
+            if not reused:
+                connection, connect_time = self.open_connection(host_name, port)
+
+            try:
+                connection.request(method, path_name, headers=headers or {})
+                return connection, connection.getresponse(), connect_time
+            except (http.client.HTTPException, ConnectionError):
+                connection.close()
+
+                # a brand new connection failing is a real problem
+                if not reused:
+                    raise
+
+    def stream(self, host_name, port, path_name, buffer, on_chunk, headers=None, response_headers=None):
+        """
+        Sends a GET request and reads the response body into buffer, one
+        chunk at a time, calling on_chunk(length) after each chunk, which
+        may return how many seconds to wait before the next one is read. It
+        returns a (status, length, connect_time, ttfb) tuple, ttfb is the
+        time until the response head arrived. If response_headers is given,
+        the response headers (lower case names) are stored in it.
+        """
+        started_at = time.perf_counter()
+        connection, response, connect_time = self.request(host_name, port, path_name, headers)
+        ttfb = time.perf_counter() - started_at - connect_time
+
+        if response_headers is not None:
+            response_headers.update((k.lower(), v) for k, v in response.getheaders())
+
+        view = memoryview(buffer)
+        length = 0
+        try:
+            while True:
+                chunk_length = response.readinto(view)
+                if chunk_length == 0:
+                    break
+                length += chunk_length
+
+                waiting_time = on_chunk(chunk_length)
+                if waiting_time:
+                    time.sleep(waiting_time)
+        except BaseException:
+            # the rest of the response is still on the way (e.g. the download was abandoned)
+            self.discard(connection)
+            raise
+
+        if response.will_close:
+            self.discard(connection)
+        else:
+            self.release(host_name, port, connection)
+
+        return response.status, length, connect_time, ttfb
+
+    def get(self, host_name, port, path_name, headers=None):
+        """
+        It returns a (status, body, connect_time) tuple.
+        """
+        connection, response, connect_time = self.request(host_name, port, path_name, headers)
+        body = response.read()
+
+        if response.will_close:
+            self.discard(connection)
+        else:
+            self.release(host_name, port, connection)
+
+        return response.status, body, connect_time
+
+    def close_all(self):
+        with self.lock:
+            for idle in self.idle_connections.values():
+                for connection in idle:
+                    connection.close()
+            self.idle_connections = {}
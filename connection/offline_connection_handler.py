@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+A ConnectionHandler that never touches the network. The MPD and the
+segment sizes come from a SegmentIndex recorded by record_dataset.py
+(the 'dataset_index' parameter), and the traffic shaping is applied
+to the recorded sizes as if the segments were downloaded.
+"""
+
+from base.message import MessageKind
+from connection.connection_handler import ConnectionHandler, SegmentAbandoned
+from connection.segment_index import SegmentIndex
+
+# indexes already loaded by this process, by file name
+loaded_indexes = {}
+
+# bytes of the error page a web server sends for a missing segment
+not_found_length = 512
+
+
+def load_segment_index(file_name):
+    if file_name not in loaded_indexes:
+        loaded_indexes[file_name] = SegmentIndex.load(file_name)
+
+    return loaded_indexes[file_name]
+
+
+class OfflineConnectionHandler(ConnectionHandler):
+
+    def __init__(self, id, session=None):
+        ConnectionHandler.__init__(self, id, session)
+
+        self.segment_index = load_segment_index(self.session.config_parser.get_parameter('dataset_index'))
+
+    def handle_xml_request(self, msg):
+        self.initial_time = self.timer.get_current_time()
+        self.handle_xml_content(self.segment_index.mpd, 0, 0)
+
+    def handle_segment_size_request(self, msg):
+        self.initial_time = self.timer.get_current_time()
+        msg.add_download_started_at(self.initial_time)
+        msg.add_transfer_started_at(self.initial_time)
+
+        print(f'Execution Time {self.timer.get_current_time()} > selected QI: {self.qi.index(msg.get_quality_id())}')
+        self.print_target_throughput()
+
+        msg.set_kind(MessageKind.SEGMENT_RESPONSE)
+        delay = 0
+
+        segment_size = self.segment_index.get_segment_size(msg.get_quality_id(), msg.get_segment_id())
+        if segment_size > 0:
+            msg.add_bit_length(8 * segment_size)
+            try:
+                delay = self.shape_transfer(msg, segment_size)
+            except SegmentAbandoned as abandoned:
+                self.abandon_segment(msg, abandoned)
+                return
+        else:
+            msg.set_found(False)
+            # the error page also takes some time to arrive
+            delay = self.transfer_time(8 * not_found_length)
+
+        self.send_up(msg, delay)
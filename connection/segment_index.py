@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+A compact index of a DASH dataset: the MPD file plus the size in bytes
+of every (representation, segment number) pair. It is recorded once
+with record_dataset.py and used by the OfflineConnectionHandler.
+
+File layout: the b'PYDASHIX' magic, a little-endian uint32 with the
+length of a json header (url_mpd, mpd, qi and segments), the header
+itself and the segment sizes as little-endian uint32, one row of
+'segments' values for each qi, in the qi order.
+"""
+
+import json
+import struct
+import sys
+from array import array
+
+MAGIC = b'PYDASHIX'
+
+
+class SegmentIndex:
+
+    def __init__(self, url_mpd, mpd, qi, segments, sizes=None):
+        self.url_mpd = url_mpd
+        self.mpd = mpd
+        # sorted list of the representations bandwidth, as parsed_mpd.get_qi()
+        self.qi = qi
+        self.segments = segments
+        self.sizes = array('I', bytes(4 * len(qi) * segments)) if sizes is None else sizes
+
+        self.qi_position = {q: i for i, q in enumerate(qi)}
+
+    def add_segment_size(self, quality_id, segment_id, size):
+        self.sizes[self.qi_position[quality_id] * self.segments + segment_id - 1] = size
+
+    def get_segment_size(self, quality_id, segment_id):
+        """
+        It returns the segment size in bytes, or 0 if the segment doesn't exist.
+        """
+        if segment_id < 1 or segment_id > self.segments:
+            return 0
+
+        return self.sizes[self.qi_position[quality_id] * self.segments + segment_id - 1]
+
+    def save(self, file_name):
+        header = json.dumps({
+            'url_mpd': self.url_mpd,
+            'mpd': self.mpd,
+            'qi': self.qi,
+            'segments': self.segments,
+        }).encode()
+
+        sizes = array('I', self.sizes)
+        if sys.byteorder == 'big':
+            sizes.byteswap()
+
+        with open(file_name, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            f.write(sizes.tobytes())
+
+    @staticmethod
+    def load(file_name):
+        with open(file_name, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{file_name} is not a segment index file')
+
+            header_length = struct.unpack('<I', f.read(4))[0]
+            header = json.loads(f.read(header_length).decode())
+
+            sizes = array('I')
+            sizes.frombytes(f.read())
+            if sys.byteorder == 'big':
+                sizes.byteswap()
+
+        return SegmentIndex(header['url_mpd'], header['mpd'], header['qi'], header['segments'], sizes)
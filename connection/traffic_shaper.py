@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+Traffic shaping model. The link capacity is a piecewise-constant
+function of time: the profile (L, M or H) changes every profile
+interval seconds, and inside a profile the capacity takes a new value
+of the profile values list every value interval seconds.
+
+The TokenBucket applies this capacity to a transfer while it happens,
+chunk by chunk, instead of delaying the whole transfer at its end.
+"""
+
+
+def get_bound(index, interval, offset=0):
+    """
+    It returns the time the interval index starts at. With a fractional
+    interval (e.g. 0.1) the product carries a rounding error, e.g.
+    3 * 0.1 - 0.3 isn't 0, so the bounds are rounded well below the
+    timer resolution.
+    """
+    return round(index * interval - offset, 9)
+
+
+def get_index(t, interval, offset=0):
+    """
+    It returns the index k of the interval [get_bound(k), get_bound(k + 1))
+    the time t is in. (t + offset) // interval is only a first guess, it
+    may be one off the rounded bounds, e.g. 0.3 // 0.1 is 2.
+    """
+    index = int((t + offset) // interval)
+    while get_bound(index + 1, interval, offset) <= t:
+        index += 1
+    while get_bound(index, interval, offset) > t:
+        index -= 1
+
+    return index
+
+
+def get_next_boundary(t, interval, offset=0):
+    """
+    It returns the first bound of an interval after t, always greater than t.
+    """
+    return get_bound(get_index(t, interval, offset) + 1, interval, offset)
+
+
+class TrafficShaper:
+
+    def __init__(self, values, sequence, profile_interval, value_interval=1):
+        # values[profile] is the list of capacities (bps) of a profile
+        self.values = values
+        # sequence of profiles (positions of values)
+        self.sequence = sequence
+        self.profile_interval = profile_interval
+        self.value_interval = value_interval
+
+    def get_positions(self, t):
+        """
+        It returns the (profile, value position) in use at the time t.
+        """
+        profile = self.sequence[get_index(t, self.profile_interval) % len(self.sequence)]
+        return profile, get_index(t, self.value_interval) % len(self.values[profile])
+
+    def get_rate(self, t):
+        profile, position = self.get_positions(t)
+        return self.values[profile][position]
+
+    def get_next_change(self, t):
+        """
+        It returns the first time after t the capacity may change.
+        """
+        return min(get_next_boundary(t, self.profile_interval), get_next_boundary(t, self.value_interval))
+
+    def get_bits_between(self, t0, t1):
+        """
+        It returns how many bits the link carries from t0 to t1.
+        """
+        bits = 0
+        while t0 < t1:
+            end = min(self.get_next_change(t0), t1)
+            bits += self.get_rate(t0) * (end - t0)
+            t0 = end
+        return bits
+
+    def get_finish_time(self, t, bits):
+        """
+        It returns when a transfer of bits started at the time t finishes.
+        """
+        while bits > 0:
+            rate = self.get_rate(t)
+            end = self.get_next_change(t)
+            capacity = rate * (end - t)
+
+            if capacity >= bits:
+                return t + bits / rate
+
+            bits -= capacity
+            t = end
+        return t
+
+
+class TokenBucket:
+
+    def __init__(self, traffic_shaper, bucket_size):
+        self.traffic_shaper = traffic_shaper
+        # bits that can be sent in a burst, above the link capacity
+        self.bucket_size = bucket_size
+        self.tokens = bucket_size
+        self.last_update = None
+
+    def get_waiting_time(self, t):
+        """
+        It returns how long a transfer starting at the time t waits for the
+        previous one to be concluded.
+        """
+        if self.last_update is None:
+            return 0
+
+        return max(0, self.last_update - t)
+
+    def consume(self, t, bits):
+        """
+        Takes bits from the bucket at the time t, and returns how long the
+        transfer must wait for these bits to respect the link capacity.
+        As the link is only one, a transfer starting before the previous
+        one was concluded waits for it.
+        """
+        waiting_time = 0
+
+        if self.last_update is None:
+            self.last_update = t
+        elif t < self.last_update:
+            waiting_time = self.last_update - t
+            t = self.last_update
+
+        self.tokens = min(self.bucket_size, self.tokens + self.traffic_shaper.get_bits_between(self.last_update, t))
+        self.tokens -= bits
+        self.last_update = t
+
+        if self.tokens >= 0:
+            return waiting_time
+
+        # the missing tokens are paid at the link capacity
+        finish_time = self.traffic_shaper.get_finish_time(t, -self.tokens)
+        self.tokens = 0
+        self.last_update = finish_time
+
+        return waiting_time + finish_time - t
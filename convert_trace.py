@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+Converts a text bandwidth log, one throughput value per line, into
+the .npy trace read by the 'traffic_trace' parameter. When the lines
+have more than one column (e.g. timestamp and throughput), the last
+one is used. Empty lines and lines starting with # are skipped.
+
+Usage: python3 convert_trace.py <text trace> <npy trace> [scale]
+
+scale multiplies every value, e.g. 1000 for traces in kbps, so the
+stored values are in bps.
+
+The trace is checked here, once, instead of at each session: a
+transfer would never finish if the link stayed at 0 bps, so negative
+(or NaN) values and traces with only zeros are rejected.
+"""
+
+import sys
+
+from connection.bandwidth_trace import save_bandwidth_trace
+
+
+def check_samples(samples):
+    # NaN isn't >= 0 either
+    if not all(sample >= 0 for sample in samples):
+        raise ValueError('a bandwidth trace can\'t have negative capacities')
+    if not any(sample > 0 for sample in samples):
+        raise ValueError('a bandwidth trace can\'t have only zeros')
+
+
+def convert(text_file_name, file_name, scale=1):
+    samples = []
+    with open(text_file_name) as f:
+        for line in f:
+            tokens = line.replace(',', ' ').split()
+            if not tokens or tokens[0].startswith('#'):
+                continue
+            samples.append(float(tokens[-1]) * scale)
+
+    check_samples(samples)
+    save_bandwidth_trace(file_name, samples)
+    print(f'> {len(samples)} samples saved in {file_name}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('Usage: python3 convert_trace.py <text trace> <npy trace> [scale]')
+        exit(-1)
+
+    convert(sys.argv[1], sys.argv[2], float(sys.argv[3]) if len(sys.argv) > 3 else 1)
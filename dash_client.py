@@ -12,32 +12,49 @@ responsible to make the communication among them happens.
 """
 
 import importlib
+import math
+import os
 
-from base.configuration_parser import ConfigurationParser
-from base.scheduler import Scheduler
+from base.results import render_results, results_file_name
+from base.session import Session
 from connection.connection_handler import ConnectionHandler
+from connection.offline_connection_handler import OfflineConnectionHandler
 from player.player import Player
 
 
 class DashClient:
 
-    def __init__(self):
-        config_parser = ConfigurationParser.get_instance()
+    def __init__(self, session=None):
+        # without a session the client runs on the default (singleton) one
+        self.session = Session.get_default() if session is None else session
+
+        config_parser = self.session.config_parser
 
         r2a_algorithm = str(config_parser.get_parameter('r2a_algorithm'))
+        # inline (saved and drawn in the finalization), deferred (only
+        # saved, see render.py) or none
+        self.plots = str(config_parser.get_parameter('plots'))
+        self.headless = config_parser.get_boolean_parameter('headless')
+        self.results_dir = config_parser.get_parameter('results_dir')
+        # sync or asyncio
+        self.runtime = str(config_parser.get_parameter('runtime'))
 
-        self.scheduler = Scheduler()
+        self.scheduler = self.session.scheduler
 
         self.modules = []
 
         # adding modules to manage
-        self.player = Player(0)
+        self.player = Player(0, self.session)
 
         # automatic loading class by the name
         r2a_class = getattr(importlib.import_module('r2a.' + r2a_algorithm.lower()), r2a_algorithm)
-        self.r2a = r2a_class(1)
+        self.r2a = r2a_class(1, self.session)
 
-        self.connection_handler = ConnectionHandler(2)
+        # a recorded dataset index replaces the web server
+        if config_parser.get_parameter('dataset_index'):
+            self.connection_handler = OfflineConnectionHandler(2, self.session)
+        else:
+            self.connection_handler = ConnectionHandler(2, self.session)
 
         self.modules.append(self.player)
         self.modules.append(self.r2a)
@@ -45,14 +62,74 @@ class DashClient:
 
 
     def run_application(self):
+        if self.runtime == 'asyncio':
+            # only imported by the asyncio runtime, it is slow to load
+            import asyncio
+
+            asyncio.run(self.run_application_async())
+            return
+
         self.modules_initialization()
 
-        while not self.scheduler.is_empty():
-            event = self.scheduler.get_event()
-            self.handle_scheduler_event(event)
+        self.run_until(math.inf)
 
         self.modules_finalization()
 
+    def run_until(self, t):
+        """
+        Delivers, in order, every event due up to the time t, including
+        the ones created meanwhile. It returns False when there isn't
+        any event left.
+        """
+        scheduler = self.scheduler
+
+        while not scheduler.is_empty() and scheduler.get_next_due_time() <= t:
+            self.handle_scheduler_event(scheduler.get_event())
+
+        return not scheduler.is_empty()
+
+
+    async def run_application_async(self):
+        """
+        Runs the client in the asyncio runtime. Several clients may share
+        the same loop, e.g. asyncio.gather(a.run_application_async(), b.run_application_async()).
+        """
+        self.modules_initialization()
+
+        await self.run_async()
+
+        self.modules_finalization()
+
+    async def run_async(self):
+        """
+        The asyncio counterpart of run_until(math.inf). The events are
+        delivered by the running loop, which waits for them with timers
+        and runs the network transfers meanwhile.
+        """
+        import asyncio
+
+        scheduler = self.scheduler
+        timer = self.session.timer
+
+        while scheduler.has_tasks() or not scheduler.is_empty():
+            timeout = None
+
+            if not scheduler.is_empty():
+                timeout = scheduler.get_next_due_time() - timer.get_current_time()
+
+                # a virtual clock can only move forward after the transfers
+                # in progress have been concluded
+                if timeout <= 0 or (timer.is_virtual() and not scheduler.has_tasks()):
+                    self.handle_scheduler_event(scheduler.get_event())
+
+                    # gives the loop to the transfers and to other clients
+                    await asyncio.sleep(0)
+                    continue
+
+                if timer.is_virtual():
+                    timeout = None
+
+            await scheduler.wait_wakeup(timeout)
 
     def handle_scheduler_event(self, event):
 
@@ -65,6 +142,14 @@ class DashClient:
 
 
 
+    def get_summary(self):
+        summary = {'r2a_algorithm': self.r2a.__class__.__name__}
+        summary.update(self.player.get_summary())
+        # e.g. the decision latency of R2AProcess
+        if hasattr(self.r2a, 'get_summary'):
+            summary.update(self.r2a.get_summary())
+        return summary
+
     def modules_initialization(self):
         print('Initialization modules phase.')
         for m in self.modules:
@@ -75,4 +160,24 @@ class DashClient:
         print('Finalization modules phase.')
         for m in self.modules:
             super(type(m), m).finalization()
-            m.finalization()
\ No newline at end of file
+            m.finalization()
+
+        self.save_results()
+
+    def save_results(self):
+        """
+        Saves the series of the modules in results_dir and, unless the
+        plots are deferred or the client is headless, draws them. It
+        returns the results file name, or None if nothing was saved.
+        """
+        if self.plots == 'none' or len(self.session.results) == 0:
+            return None
+
+        os.makedirs(self.results_dir, exist_ok=True)
+        file_name = os.path.join(self.results_dir, results_file_name)
+        self.session.results.save(file_name)
+
+        if self.plots == 'inline' and not self.headless:
+            render_results(file_name)
+
+        return file_name
\ No newline at end of file
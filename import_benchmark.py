@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+Cold start benchmark. Each round starts a fresh interpreter that
+imports the client and builds a headless DashClient for every R2A
+algorithm, which is what a sweep run pays before its first request.
+It fails (exit code 1) when the best round is above the budget or when
+a slow library (matplotlib, seaborn, scipy, numpy, or asyncio, which
+only the asyncio runtime needs) was imported.
+
+Usage: python3 import_benchmark.py [budget in seconds] [rounds]
+
+The budget defaults to 0.5 s and the rounds to 5.
+"""
+
+import json
+import subprocess
+import sys
+
+# libraries a headless client must not load before the first request
+slow_modules = ['matplotlib', 'seaborn', 'scipy', 'numpy', 'asyncio']
+
+r2a_algorithms = ['R2AFixed', 'R2ARandom', 'R2A_AverageThroughput', 'R2ASimpleMajority',
+                  'R2ADemocratic', 'R2ADemocraticAndBufferSize', 'R2ATruong']
+
+cold_start = f'''
+import json, sys, time
+started_at = time.perf_counter()
+
+from base.session import Session
+from dash_client import DashClient
+
+with open('dash_client.json') as f:
+    parameters = json.load(f)
+parameters['headless'] = True
+
+for r2a_algorithm in {r2a_algorithms!r}:
+    parameters['r2a_algorithm'] = r2a_algorithm
+    DashClient(Session.from_parameters(dict(parameters)))
+
+elapsed = time.perf_counter() - started_at
+print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {slow_modules!r} if m in sys.modules]}}))
+'''
+
+
+def measure():
+    """
+    It returns the (elapsed time, slow modules loaded) of a fresh interpreter.
+    """
+    output = subprocess.run([sys.executable, '-c', cold_start], capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.splitlines()[-1])
+    return result['elapsed'], result['loaded']
+
+
+if __name__ == '__main__':
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    results = [measure() for _ in range(rounds)]
+    best = min(elapsed for elapsed, _ in results)
+    loaded = sorted(set(m for _, modules in results for m in modules))
+
+    print(f'> cold start: best {best:.4f} s, worst {max(elapsed for elapsed, _ in results):.4f} s, budget {budget} s')
+    if loaded:
+        print(f'> slow modules loaded: {", ".join(loaded)}')
+
+    if best > budget or loaded:
+        print('> cold start budget exceeded')
+        exit(1)
+
+    print('> cold start budget holds')
@@ -5,9 +5,21 @@
 @description: PyDash Project
 
 Everything always starts from somewhere =)
+
+Usage: python3 main.py [--headless]
+
+--headless doesn't plot the statistics, so matplotlib is never loaded.
 """
 
+import sys
+
+from base.configuration_parser import ConfigurationParser
 from dash_client import DashClient
 
-dash_client = DashClient()
-dash_client.run_application()
\ No newline at end of file
+# guarded, the worker processes (e.g. of R2AProcess) import this module
+if __name__ == '__main__':
+    if '--headless' in sys.argv[1:]:
+        ConfigurationParser.get_instance().set_parameter('headless', True)
+
+    dash_client = DashClient()
+    dash_client.run_application()
@@ -5,21 +5,190 @@
 @description: PyDash Project
 
 OutVector class stores all simulation statistics to be plot later.
+
+The samples are kept in two typed array columns (time and item), which
+are doubled when they are full, so a sample costs 16 bytes instead of a
+list and two boxed numbers. get_times() and get_values() are zero-copy
+views of the columns (numpy views with as_numpy()), and get_items() is a
+live sequence of (t, item) tuples, as the Whiteboard expects, which also
+reads only the samples added since a cursor (read_since()).
+
+With a retention of N samples (see get_retention()), the memory of an
+OutVector is bounded: only the last N to 2N samples are kept as they
+are, the older ones are rolled into a fixed number of (min, max, mean)
+buckets, whose span doubles each time they are all used. get_count()
+and get_sum() still account for every sample ever added.
 """
 
-import datetime
+from array import array
+
+
+def get_retention(config_parser, name):
+    """
+    It returns the retention of the series name, given by the 'retention'
+    parameter: a number of samples for every series, or a dict of series
+    name (or 'default') -> number of samples. 0 keeps every sample.
+    """
+    retention = config_parser.get_parameter('retention')
+    if isinstance(retention, dict):
+        retention = retention.get(name, retention.get('default', 0))
+
+    return int(retention)
+
+
+class SampleSummaries:
+    """
+    Up to size buckets of (first t, last t, min, max, mean, count) of consecutive samples.
+    """
+
+    def __init__(self, size):
+        self.size = max(2, size)
+        # samples per bucket
+        self.span = 1
+        self.buckets = []
+
+    def add(self, t, value):
+        if not self.buckets or self.buckets[-1][5] == self.span:
+            if len(self.buckets) == self.size:
+                self.merge()
+
+        if self.buckets and self.buckets[-1][5] < self.span:
+            first_t, _, minimum, maximum, mean, count = self.buckets[-1]
+            self.buckets[-1] = (first_t, t, min(minimum, value), max(maximum, value),
+                                mean + (value - mean) / (count + 1), count + 1)
+        else:
+            self.buckets.append((t, t, value, value, value, 1))
+
+    def merge(self):
+        """
+        Merges the buckets two by two, doubling their span.
+        """
+        buckets = []
+        for i in range(0, len(self.buckets) - 1, 2):
+            a, b = self.buckets[i], self.buckets[i + 1]
+            count = a[5] + b[5]
+            buckets.append((a[0], b[1], min(a[2], b[2]), max(a[3], b[3]), (a[4] * a[5] + b[4] * b[5]) / count, count))
+
+        if len(self.buckets) % 2:
+            buckets.append(self.buckets[-1])
+
+        self.buckets = buckets
+        self.span *= 2
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def get_buckets(self):
+        return self.buckets
+
+
+class OutVectorItems:
+    """
+    A live, read only sequence of the (t, item) samples (or only the
+    items) kept by an OutVector.
+    """
+
+    def __init__(self, out_vector, items_only=False):
+        self.out_vector = out_vector
+        self.items_only = items_only
+
+    def __len__(self):
+        return len(self.out_vector)
+
+    def __getitem__(self, key):
+        times, values = self.out_vector.get_times(), self.out_vector.get_values()
+
+        if self.items_only:
+            return values[key].tolist() if isinstance(key, slice) else values[key]
+
+        if isinstance(key, slice):
+            return list(zip(times[key], values[key]))
+
+        return times[key], values[key]
+
+    def __iter__(self):
+        if self.items_only:
+            return iter(self.out_vector.get_values())
+
+        return zip(self.out_vector.get_times(), self.out_vector.get_values())
+
+    def __str__(self):
+        return list(self).__str__()
+
+    def read_since(self, cursor=0):
+        """
+        It returns a (samples, cursor) tuple: the samples added since the
+        cursor (0 is the beginning) and the cursor for the next call. The
+        samples rolled into the summaries meanwhile are lost.
+        """
+        dropped, length = self.out_vector.dropped, len(self.out_vector)
+        return self[max(0, cursor - dropped):length], dropped + length
 
 
 class OutVector:
 
-    def __init__(self):
-        self.items = []
+    def __init__(self, typecode='d', capacity=64, retention=0, summaries_size=512):
+        # retention: at least the last retention samples are kept (0 keeps every
+        # one), the older ones are rolled into summaries_size buckets
+        self.retention = retention
+        if retention:
+            capacity = 2 * retention
+
+        # typecode of the items, the times are always floats
+        self.times = array('d', bytes(8 * capacity))
+        self.values = array(typecode, bytes(array(typecode).itemsize * capacity))
+        self.length = 0
+        self.items = OutVectorItems(self)
+        self.values_items = OutVectorItems(self, items_only=True)
+
+        # samples rolled into the summaries, and count and sum of every sample
+        self.dropped = 0
+        self.count = 0
+        self.sum = 0
+        self.summaries = SampleSummaries(summaries_size)
+
+    def grow(self):
+        # new arrays, so the views already given keep valid
+        for name in ('times', 'values'):
+            old = getattr(self, name)
+            new = array(old.typecode, bytes(2 * len(old) * old.itemsize))
+            new[:self.length] = old[:self.length]
+            setattr(self, name, new)
+
+    def roll(self):
+        """
+        Rolls the oldest samples into the summaries, keeping the last retention ones.
+        """
+        rolled = self.length - self.retention
+        for i in range(rolled):
+            self.summaries.add(self.times[i], self.values[i])
+
+        # new arrays, so the views already given keep valid
+        for name in ('times', 'values'):
+            old = getattr(self, name)
+            new = array(old.typecode, bytes(len(old) * old.itemsize))
+            new[:self.retention] = old[rolled:self.length]
+            setattr(self, name, new)
+
+        self.length = self.retention
+        self.dropped += rolled
 
     def add(self, t, item):
-        self.items.append([t, item])
+        if self.length == len(self.times):
+            if self.retention:
+                self.roll()
+            else:
+                self.grow()
+
+        self.times[self.length] = t
+        self.values[self.length] = item
+        self.length += 1
+
+        self.count += 1
+        self.sum += item
 
     def __len__(self):
-        return len(self.items)
+        return self.length
 
     def __str__(self):
         return self.items.__str__()
@@ -27,8 +196,88 @@ class OutVector:
     def get_items(self):
         return self.items
 
-    #def __getitem__(self, key):
-    #    if len(self.items) == 0:
-    #        return []
+    def get_values_items(self):
+        """
+        It returns a live, read only sequence of the items only.
+        """
+        return self.values_items
+
+    def get_count(self):
+        return self.count
+
+    def get_sum(self):
+        return self.sum
+
+    def get_last(self, i=1):
+        """
+        It returns the i-th last item.
+        """
+        if not 0 < i <= self.length:
+            raise IndexError(f'only the last {self.length} items are kept')
+
+        return self.values[self.length - i]
+
+    def get_summaries(self):
+        """
+        It returns the (first t, last t, min, max, mean, count) buckets of the samples no longer kept.
+        """
+        return self.summaries.get_buckets()
+
+    def get_series(self):
+        """
+        It returns the (times, items) of every sample, the ones no longer kept
+        as the mean of their buckets (at the middle time), e.g. to be plot.
+        They are copies (arrays or lists), which can be pickled to another
+        process, unlike the views of get_times() and get_values().
+        """
+        if not self.dropped:
+            return self.times[:self.length], self.values[:self.length]
+
+        buckets = self.summaries.get_buckets()
+        times = [(first_t + last_t) / 2 for first_t, last_t, _, _, _, _ in buckets] + self.get_times().tolist()
+        values = [mean for _, _, _, _, mean, _ in buckets] + self.get_values().tolist()
+        return times, values
+
+    def get_times(self):
+        """
+        It returns a zero-copy view (memoryview) of the times of the samples.
+        """
+        return memoryview(self.times)[:self.length]
+
+    def get_values(self):
+        """
+        It returns a zero-copy view (memoryview) of the items of the samples.
+        """
+        return memoryview(self.values)[:self.length]
+
+    def as_numpy(self):
+        """
+        It returns the (times, items) numpy arrays, sharing the memory of the columns.
+        """
+        import numpy as np
+
+        return (np.frombuffer(self.times, dtype=np.float64, count=self.length),
+                np.frombuffer(self.values, dtype=self.values.typecode, count=self.length))
+
+    def to_npz(self, file_name):
+        """
+        Saves the samples as the t and item arrays of a .npz file.
+        """
+        import numpy as np
+
+        times, values = self.as_numpy()
+        np.savez(file_name, t=times, item=values)
+
+    def to_csv(self, file_name, header=('t', 'item')):
+        """
+        Saves the samples to a csv file, one (t, item) line each. The
+        columns are interleaved and formatted by a single % operation,
+        instead of a Python loop over the samples.
+        """
+        data = [None] * (2 * self.length)
+        data[0::2] = self.get_times().tolist()
+        data[1::2] = self.get_values().tolist()
 
-    #    return self.items[key]
+        with open(file_name, 'w') as f:
+            f.write(','.join(header) + '\n')
+            f.write(('%r,%r\n' * self.length) % tuple(data))
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+The Player buffer. It is a ring of the segments not played yet, kept in
+typed arrays (QI, duration, time stored and seconds already played of
+each segment), so storing and playing video doesn't allocate objects
+and the memory doesn't grow with the video length. The segment
+durations may be fractional.
+
+The time each played second spent in the buffer is flushed to the
+time_at_buffer history (an OutVector, by play time).
+"""
+
+from array import array
+
+from player.out_vector import OutVector
+
+
+class PlaybackBuffer:
+
+    def __init__(self, capacity, retention=0, summaries_size=512):
+        # capacity in segments, it is doubled if it is ever reached
+        self.capacity = max(1, capacity)
+        self.qi = array('i', bytes(4 * self.capacity))
+        self.durations = array('d', bytes(8 * self.capacity))
+        self.stored_at = array('d', bytes(8 * self.capacity))
+        self.played = array('d', bytes(8 * self.capacity))
+
+        # position of the next segment to be played and number of segments in the ring
+        self.head = 0
+        self.count = 0
+
+        # seconds of video to be played, stored and played since the beginning
+        self.level = 0
+        self.stored_total = 0
+        self.played_total = 0
+        self.segments_stored = 0
+
+        # time (s) each played second spent in the buffer
+        self.time_at_buffer = OutVector(retention=retention, summaries_size=summaries_size)
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        size = self.capacity
+        positions = [(self.head + i) % size for i in range(self.count)]
+
+        for name in ('qi', 'durations', 'stored_at', 'played'):
+            old = getattr(self, name)
+            new = array(old.typecode, bytes(2 * size * old.itemsize))
+            for i, position in enumerate(positions):
+                new[i] = old[position]
+            setattr(self, name, new)
+
+        self.capacity = 2 * size
+        self.head = 0
+
+    def push(self, qi, duration, t):
+        """
+        Stores, at the time t, a segment of duration seconds and quality index qi.
+        """
+        if self.count == self.capacity:
+            self.grow()
+
+        position = (self.head + self.count) % self.capacity
+        self.qi[position] = qi
+        self.durations[position] = duration
+        self.stored_at[position] = t
+        self.played[position] = 0
+        self.count += 1
+
+        self.level += duration
+        self.stored_total += duration
+        self.segments_stored += 1
+
+    def play(self, seconds, t):
+        """
+        Plays, at the time t, up to seconds of video from the oldest
+        segments, and returns how much was played.
+        """
+        if self.count == 0:
+            return 0
+
+        self.time_at_buffer.add(t, round(t - self.stored_at[self.head], 6))
+
+        played = 0
+        while seconds > played and self.count > 0:
+            remaining = self.durations[self.head] - self.played[self.head]
+            amount = seconds - played
+            if amount > remaining:
+                amount = remaining
+
+            self.played[self.head] += amount
+            played += amount
+
+            # fractional durations may leave a rounding error behind
+            if self.durations[self.head] - self.played[self.head] < 1e-9:
+                self.head = (self.head + 1) % self.capacity
+                self.count -= 1
+
+        self.level -= played
+        self.played_total += played
+        return played
+
+    def get_level(self):
+        """
+        It returns the seconds of video still to be played.
+        """
+        return self.level
+
+    def get_current_qi(self):
+        """
+        It returns the QI of the segment being played, or None if the buffer is empty.
+        """
+        if self.count == 0:
+            return None
+
+        return self.qi[self.head]
+
+    def get_qi_list(self):
+        """
+        It returns the QI of each segment in the buffer, from the oldest one.
+        """
+        return tuple(self.qi[(self.head + i) % self.capacity] for i in range(self.count))
+
+    def get_stored_total(self):
+        return self.stored_total
+
+    def get_played_total(self):
+        return self.played_total
+
+    def get_segments_stored(self):
+        return self.segments_stored
+
+    def get_time_at_buffer(self):
+        """
+        It returns a live, read only sequence of the time each played second spent in the buffer.
+        """
+        return self.time_at_buffer.get_values_items()
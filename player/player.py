@@ -8,188 +8,273 @@ This is the player representation. It has the buffer and submit
 segments requests to the lower layers. The Payer stores
 the received segments in the buffer to be consumed later.
 Also "watches" the movie and compute the statistics.
+
+There is no playback thread: the video is played by events scheduled
+to the time the buffer runs dry, and rescheduled when a segment
+arrives, so the pauses are measured at their exact times.
 """
 import glob
+import json
 import os
-import threading
-import time
-from matplotlib import pyplot as plt
 
-from base.configuration_parser import ConfigurationParser
 from base.message import *
+from base.whiteboard import PlaybackClock, PlaybackSnapshot
 from base.simple_module import SimpleModule
-from base.timer import Timer
-from player.out_vector import OutVector
+from player.out_vector import OutVector, get_retention
+from player.playback_buffer import PlaybackBuffer
+from player.qoe import QoEMetrics
+from player.throughput_estimators import ThroughputEstimators
 from player.parser import *
-from base.whiteboard import Whiteboard
 
 '''
 quality_id - Taxa em que o video foi codificado (46980bps, ..., 4726737bps)
 qi         - indice de qualidade normalizado
 segment_id - número de sequência do arquivo de video
 
-Player is a Singleton class implementation
-
 '''
 
 
 class Player(SimpleModule):
 
-    def __init__(self, id):
-        SimpleModule.__init__(self, id)
+    def __init__(self, id, session=None):
+        SimpleModule.__init__(self, id, session)
 
-        config_parser = ConfigurationParser.get_instance()
+        config_parser = self.session.config_parser
 
         self.buffering_until = int(config_parser.get_parameter('buffering_until'))
         self.max_buffer_size = int(config_parser.get_parameter('max_buffer_size'))
         self.playback_step = int(config_parser.get_parameter('playbak_step'))
         self.url_mpd = config_parser.get_parameter('url_mpd')
+        # where the statistics of this run are written
+        self.results_dir = config_parser.get_parameter('results_dir')
+        # how many segments may be downloading at the same time
+        self.max_inflight_segments = int(config_parser.get_parameter('max_inflight_segments'))
+        # buckets of the statistics no longer kept (see out_vector.py)
+        self.retention_summaries = int(config_parser.get_parameter('retention_summaries'))
 
         # last pause started at time
         self.pause_started_at = None
         self.pauses_number = 0
+        # length (s) of the last pause
+        self.last_pause = None
 
         # tag to verify if buffer has an minimal amount of data
         self.buffer_initialization = True
 
-        # Does the player already started to download a segment?
-        self.already_downloading = False
+        # segments being downloaded, segment_id -> request time
+        self.inflight_segments = {}
+
+        # segments received before a previous one, waiting to be buffered
+        self.received_segments = {}
+        self.next_buffered_segment_id = 1
 
-        # buffer itself
-        self.buffer = []
+        # set when the server doesn't have a segment, nothing after it is requested
+        self.last_segment_id = None
 
-        # the buffer played position
-        self.buffer_played = 0
+        # buffer itself, a ring of the segments not played yet (it grows if
+        # shorter segments than expected ever fill it)
+        self.buffer = PlaybackBuffer(self.max_buffer_size + self.max_inflight_segments + 1,
+                                     get_retention(config_parser, 'time_at_buffer'), self.retention_summaries)
 
         # history of what was played in buffer
         self.playback_history = []
 
         # initialize with the first segment sequence number to download
         self.segment_id = 1
+        self.segment_size = 1
 
         self.parsed_mpd = ''
         self.qi = []
 
-        self.timer = Timer.get_instance()
-
-        # threading playback
-        self.playback_thread = threading.Thread(target=self.handle_video_playback)
-        self.player_thread_events = threading.Event()
-        self.lock = threading.Lock()
-        self.kill_playback_thread = False
-
-        self.request_time = 0
-
-        self.playback_segment_size_time_at_buffer = []
-        self.playback_qi = OutVector()
-        self.playback_quality_qi = OutVector()
-        self.playback_pauses = OutVector()
-        self.playback = OutVector()
-        self.playback_buffer_size = OutVector()
-        self.throughput = OutVector()
-
-        self.whiteboard = Whiteboard.get_instance()
+        self.timer = self.session.timer
+
+        # the playback is a sequence of events: each one plays the video due
+        # since the previous one, and the next one is scheduled to the time
+        # the buffer runs dry (see advance_playback() and schedule_playback())
+        self.playing = False
+        # time the next playback_step seconds of video start to be played
+        self.next_play_at = 0
+        # the pending playback event, the older ones are ignored
+        self.playback_event = None
+        # every segment was downloaded, an empty buffer is the end of the video
+        self.download_finished = False
+
+        # the download is stopped until the buffer has some free space, the
+        # resume event is scheduled to the time the playback frees it
+        self.waiting_buffer_space = False
+        self.resume_event = None
+
+        self.playback_qi = self.create_out_vector('playback_qi', 'q')
+        self.playback_quality_qi = self.create_out_vector('playback_quality_qi', 'q')
+        self.playback_pauses = self.create_out_vector('playback_pauses')
+        self.playback = self.create_out_vector('playback', 'q')
+        self.playback_buffer_size = self.create_out_vector('playback_buffer_size')
+        self.throughput = self.create_out_vector('throughput')
+        # bytes wasted by each abandoned download
+        self.abandoned_bytes = self.create_out_vector('abandoned_bytes', 'q')
+
+        # updated along the playback, see get_summary()
+        self.qoe = QoEMetrics()
+
+        # segment throughput statistics shared with the R2As
+        self.throughput_estimators = ThroughputEstimators(
+            int(config_parser.get_parameter('throughput_window')),
+            float(config_parser.get_parameter('throughput_half_life')),
+            [float(p) for p in config_parser.get_parameter('throughput_quantiles')])
+
+        self.whiteboard = self.session.whiteboard
         self.whiteboard.add_playback_history(self.playback.get_items())
         self.whiteboard.add_playback_qi(self.playback_qi.get_items())
         self.whiteboard.add_playback_pauses(self.playback_pauses.get_items())
         self.whiteboard.add_playback_buffer_size(self.playback_buffer_size.get_items())
         self.whiteboard.add_buffer(self.buffer)
-        self.whiteboard.add_playback_segment_size_time_at_buffer(self.playback_segment_size_time_at_buffer)
+        self.whiteboard.add_playback_segment_size_time_at_buffer(self.buffer.get_time_at_buffer())
         self.whiteboard.add_max_buffer_size(self.max_buffer_size)
+        self.whiteboard.add_qoe(self.qoe)
+        self.whiteboard.add_throughput_estimators(self.throughput_estimators)
+
+    def create_out_vector(self, name, typecode='d'):
+        return OutVector(typecode, retention=get_retention(self.session.config_parser, name),
+                         summaries_size=self.retention_summaries)
 
     def get_qi(self, quality_qi):
         return self.qi.index(quality_qi)
 
-    def get_amount_of_video_to_play_without_lock(self):
-        video_data = len(self.buffer) - self.buffer_played
-        self.whiteboard.add_amount_video_to_play(video_data)
-        return video_data
-
     def get_amount_of_video_to_play(self):
-        self.lock.acquire()
-        video_data = len(self.buffer) - self.buffer_played
-        self.lock.release()
-        self.whiteboard.add_amount_video_to_play(video_data)
-        return video_data
+        return self.buffer.get_level()
 
     def is_there_something_to_play(self):
         return bool(self.get_amount_of_video_to_play() > 0)
 
     def get_current_playtime_position(self):
-        self.lock.acquire()
-        player_position = self.buffer_played
-        self.lock.release()
-
-        return player_position
+        return self.buffer.get_played_total()
 
     def get_buffer_size(self):
-        self.lock.acquire()
-        bs = len(self.buffer)
-        self.lock.release()
-        return bs
-
-    # called function every time a segment was played
-    def handle_video_playback(self):
-        while True:
-            self.lock.acquire()
-            current_time = self.timer.get_current_time()
-            buffer_size = self.get_amount_of_video_to_play_without_lock()
-            # print(f'{current_time} player acordou')
-
-            # there is something to play
-            if buffer_size > 0:
-                # player thread is sleeping.
-                if buffer_size >= self.max_buffer_size and not self.already_downloading:
-                    print(f'{current_time} Acordar Player Thread!')
-                    self.player_thread_events.set()
-                    self.player_thread_events.clear()
-
-                for i in range(self.playback_step):
-                    qi = self.buffer[self.buffer_played]
-                    self.playback_qi.add(current_time, qi)
-                    self.playback_quality_qi.add(current_time, self.qi[qi])
-                    self.playback.add(current_time, 1)
-
-                    # compute the difference time from writing to read the segment in the buffer
-                    #self.playback_segment_size_time_at_buffer[self.buffer_played] -= current_time
-                    self.playback_segment_size_time_at_buffer[self.buffer_played][1] = current_time
-
-                    self.buffer_played += 1
-
-                buffer_size = self.get_amount_of_video_to_play_without_lock()
-                self.playback_buffer_size.add(current_time, buffer_size)
-                print(f'Execution Time {current_time} > buffer size: {buffer_size}')
-
-                if self.pause_started_at is not None:
-                    # pause_time = (time.time_ns() - self.pause_started_at) * 1e-9
-                    pause_time = current_time - self.pause_started_at
-                    self.playback_pauses.add(current_time, pause_time)
-                    self.pause_started_at = None
-            else:
-                # self.pause_started_at = time.time_ns()
-                self.playback.add(current_time, 0)
-
-                if self.pause_started_at is None:
-                    self.pauses_number += 1
-                    self.pause_started_at = current_time
+        return self.buffer.get_stored_total()
+
+    def advance_playback(self, t):
+        """
+        Plays the video due until the time t. Each playback_step seconds
+        are played (and recorded) at the exact time they start, and the
+        buffer running dry starts a pause, unless the video is over.
+        """
+        while self.playing and self.next_play_at <= t:
+            play_at = self.next_play_at
+
+            if self.buffer.get_current_qi() is None:
+                self.playing = False
+
+                if self.download_finished:
+                    print(f'Execution Time {play_at} > the video is over')
+                    break
+
+                self.playback.add(play_at, 0)
+                self.pauses_number += 1
+                self.pause_started_at = play_at
+                self.qoe.add_stall(play_at)
+                print(f'Execution Time {play_at} > pause started')
+                break
 
-            # update buffer_size
-            buffer_size = self.get_amount_of_video_to_play_without_lock()
-            self.lock.release()
+            played = 0
+            for i in range(self.playback_step):
+                qi = self.buffer.get_current_qi()
+                if qi is None:
+                    break
+
+                self.playback_qi.add(play_at, qi)
+                self.playback_quality_qi.add(play_at, self.qi[qi])
+                self.qoe.add_played(qi, self.qi[qi])
+                self.playback.add(play_at, 1)
+
+                # the time this second spent in the buffer goes to its history
+                played += self.buffer.play(1, play_at)
+
+            # rounded as the Timer
+            self.next_play_at = round(play_at + played, 6)
+
+            buffer_size = self.buffer.get_level()
+            self.playback_buffer_size.add(play_at, buffer_size)
+            print(f'Execution Time {play_at} > buffer size: {buffer_size}')
+
+        self.publish_snapshot()
+
+    def publish_snapshot(self):
+        """
+        Replaces the PlaybackSnapshot and the PlaybackClock of the Whiteboard
+        by new ones, after the buffer or the playback changed.
+        """
+        self.whiteboard.add_playback_clock(PlaybackClock(
+            self.buffer.get_level(), self.playing, self.next_play_at, self.playback_step))
+
+        snapshot = self.whiteboard.get_playback_snapshot()
+        self.whiteboard.add_playback_snapshot(PlaybackSnapshot(
+            snapshot.version + 1, self.timer.get_current_time(), self.buffer.get_level(), self.playing,
+            self.qoe.last_qi, self.last_pause, self.throughput_estimators.last))
+
+    def start_playback(self, t):
+        """
+        Starts (or resumes, after a pause) playing the video at the time t.
+        """
+        if self.pause_started_at is not None:
+            self.last_pause = t - self.pause_started_at
+            self.playback_pauses.add(t, self.last_pause)
+            self.pause_started_at = None
+
+        self.qoe.add_playback_start(t)
+        self.playing = True
+        self.next_play_at = t
+        self.advance_playback(t)
+
+        if self.waiting_buffer_space:
+            self.schedule_resume()
+
+    def schedule_playback(self):
+        """
+        Schedules the next playback event to the time the buffer runs dry.
+        """
+        self.playback_event = None
+        if not self.playing:
+            return
 
-            if (not threading.main_thread().is_alive() or self.kill_playback_thread) and buffer_size <= 0:
-                print(f'Execution Time {current_time}  thread {threading.get_ident()} will be killed.')
-                break
+        self.playback_event = Message(MessageKind.SELF, 'playback')
+        self.schedule_at(self.playback_event, self.next_play_at + self.buffer.get_level())
+
+    def get_resume_time(self):
+        """
+        It returns the time the playback step that frees space for one more
+        segment (see has_buffer_space()) starts, or None if the video isn't
+        being played.
+        """
+        if not self.playing:
+            return None
+
+        amount = self.buffer.get_level() + len(self.inflight_segments) * self.segment_size
+        excess = amount - self.max_buffer_size
+        if excess < 0:
+            return self.timer.get_current_time()
+
+        # each step plays playback_step seconds, the first one at next_play_at
+        steps = int(excess // self.playback_step)
+        return round(self.next_play_at + steps * self.playback_step, 6)
+
+    def schedule_resume(self):
+        """
+        Schedules the download to be resumed when the buffer drains enough,
+        instead of checking it at every playback step.
+        """
+        self.resume_event = None
+        resume_time = self.get_resume_time()
+        if resume_time is None:
+            # the playback (re)start schedules it
+            return
 
-            # playback steps
-            # print(f'{current_time} player vai dormir')
-            time.sleep(self.playback_step)
+        self.resume_event = Message(MessageKind.SELF, 'resume')
+        self.schedule_at(self.resume_event, resume_time)
 
     def buffering_video_segment(self, msg):
         # buffer already stored the segment id
-        buffer_size = self.get_buffer_size()
-        if buffer_size >= ((msg.get_segment_id() - 1) * msg.get_segment_size() + 1):
-            raise ValueError(f'buffer: {buffer_size}, {msg}')
+        if self.buffer.get_segments_stored() >= msg.get_segment_id():
+            raise ValueError(f'buffer: {self.get_buffer_size()}, {msg}')
 
         # adding the segment in the buffer
         self.store_in_buffer(self.get_qi(msg.get_quality_id()), msg.get_segment_size())
@@ -199,29 +284,41 @@ class Player(SimpleModule):
         buffer_size = self.get_amount_of_video_to_play()
         self.playback_buffer_size.add(current_time, buffer_size)
         print(f'Execution Time {current_time} > buffer size: {buffer_size}')
+        self.publish_snapshot()
 
         if self.buffer_initialization and self.get_amount_of_video_to_play() >= self.buffering_until:
             self.buffer_initialization = False
             print(f'Execution Time {self.timer.get_current_time()} buffering process is concluded')
-            self.playback_thread.start()
+            self.start_playback(current_time)
+        elif not self.buffer_initialization and not self.playing:
+            # the pause is over
+            self.start_playback(current_time)
 
     def store_in_buffer(self, qi, segment_size):
-        self.lock.acquire()
-        current_time = self.timer.get_current_time()
-
-        for i in range(segment_size):
-            self.buffer.append(qi)
+        self.buffer.push(qi, segment_size, self.timer.get_current_time())
+
+    def has_buffer_space(self):
+        """
+        It returns if the buffer still has space for one more segment,
+        counting the segments being downloaded.
+        """
+        amount = self.get_amount_of_video_to_play() + len(self.inflight_segments) * self.segment_size
+        return amount < self.max_buffer_size
+
+    def request_next_segments(self):
+        """
+        Requests the next segment and, while the in-flight window and the
+        buffer allow it, the following ones.
+        """
+        self.request_next_segment()
 
-            # logging the time the segment size was written in the buffer
-            self.playback_segment_size_time_at_buffer.append([current_time, -1])
-        self.lock.release()
+        while len(self.inflight_segments) < self.max_inflight_segments and self.has_buffer_space():
+            self.request_next_segment()
 
     def request_next_segment(self):
-        if self.already_downloading:
-            raise ValueError('Something doesn\'t look right, a segment is already being downloaded!')
+        if len(self.inflight_segments) >= self.max_inflight_segments:
+            raise ValueError('Something doesn\'t look right, too many segments are already being downloaded!')
 
-        self.request_time = time.perf_counter()
-        # self.request_time = self.timer.get_current_time()
         segment_request = SSMessage(MessageKind.SEGMENT_REQUEST)
 
         url_tokens = self.url_mpd.split('/')
@@ -230,17 +327,20 @@ class Player(SimpleModule):
         segment_request.add_path_name('/'.join(url_tokens[:len(url_tokens) - 1]))
         segment_request.add_media_mpd(navigate_mpd(self.parsed_mpd, 'media')[1])
         segment_request.add_segment_id(self.segment_id)
-
-        self.segment_id += 1
+        self.segment_size = segment_request.get_segment_size()
 
         # set status to downloading a segment
-        self.already_downloading = True
+        self.inflight_segments[self.segment_id] = self.timer.get_current_time()
+
+        self.segment_id += 1
 
         print(f'Execution Time {self.timer.get_current_time()} > request: {segment_request}')
 
         self.send_down(segment_request)
 
     def initialize(self):
+        self.qoe.add_session_start(self.timer.get_current_time())
+
         # starting the application downloading mdp file
         xml_request = Message(MessageKind.XML_REQUEST, self.url_mpd)
         self.send_down(xml_request)
@@ -249,10 +349,35 @@ class Player(SimpleModule):
 
         print(f'Pauses number: {self.pauses_number}')
 
-        [os.remove(f) for f in glob.glob('./results/*.png')]
+        os.makedirs(self.results_dir, exist_ok=True)
+        [os.remove(f) for f in glob.glob(os.path.join(self.results_dir, '*.png'))]
 
         self.logging_all_statistics()
 
+        with open(os.path.join(self.results_dir, 'summary.json'), 'w') as f:
+            json.dump(self.get_summary(), f, indent=4)
+
+    def get_summary(self):
+        """
+        It returns a dict with the main statistics (and QoE metrics) of the playback.
+        """
+        qoe = self.qoe
+
+        return {
+            'played_time': qoe.played_time,
+            'average_qi': round(qoe.get_average_qi(), 6),
+            'average_quality_qi': round(qoe.get_average_bitrate(), 6),
+            'qi_switches': qoe.switches,
+            'average_switch_magnitude': round(qoe.switches_magnitude / qoe.switches, 6) if qoe.switches else 0,
+            'startup_delay': round(qoe.startup_delay, 6) if qoe.startup_delay is not None else None,
+            'pauses_number': qoe.rebuffer_count,
+            'pauses_time': round(qoe.rebuffer_time, 6),
+            'rebuffer_ratio': round(qoe.get_rebuffer_ratio(), 6),
+            'qoe_score': round(qoe.get_score(), 6),
+            'abandonments': self.abandoned_bytes.get_count(),
+            'abandoned_bytes': self.abandoned_bytes.get_sum(),
+        }
+
     def handle_xml_response(self, msg):
         self.parsed_mpd = parse_mpd(msg.get_payload())
         self.qi = self.parsed_mpd.get_qi()
@@ -260,42 +385,81 @@ class Player(SimpleModule):
 
     def handle_segment_size_response(self, msg):
 
-        # set status to not downloading a segment
-        self.already_downloading = False
+        # set status to not downloading this segment
+        self.inflight_segments.pop(msg.get_segment_id())
 
         current_time = self.timer.get_current_time()
+        self.advance_playback(current_time)
         print(f'Execution Time {current_time} > received: {msg}')
 
+        self.handle_segment(msg, current_time)
+        self.schedule_playback()
+
+    def handle_segment(self, msg, current_time):
+        for abandoned_at, quality_id, new_quality_id, wasted_length in msg.get_abandonments():
+            self.abandoned_bytes.add(abandoned_at, wasted_length)
+            print(f'Execution Time {current_time} > segment {msg.get_segment_id()} abandoned at {abandoned_at}: '
+                  f'{quality_id} -> {new_quality_id}, {wasted_length} bytes wasted')
+
         if msg.found():
-            measured_throughput = msg.get_bit_length() / (time.perf_counter() - self.request_time)
+            # from the start of the transfer on the link, as the R2As measure it, not
+            # the request: a pipelined segment waits for the ones ahead of it
+            download_time = current_time - msg.get_transfer_started_at()
+            measured_throughput = msg.get_bit_length() / download_time
             self.throughput.add(current_time, measured_throughput)
+            self.qoe.add_segment(msg.get_bit_length(), download_time)
+
+            self.throughput_estimators.add(measured_throughput, download_time)
+            self.publish_snapshot()
 
             print(f'Execution Time {self.timer.get_current_time()} > measured throughput: {measured_throughput}')
 
-            # self.throughput.add(current_time, msg.get_bit_length() /(current_time - self.request_time))
-            self.buffering_video_segment(msg)
+            # the segments go to the buffer in order, even if they don't arrive so
+            self.received_segments[msg.get_segment_id()] = msg
+            while self.next_buffered_segment_id in self.received_segments:
+                self.buffering_video_segment(self.received_segments.pop(self.next_buffered_segment_id))
+                self.next_buffered_segment_id += 1
+
+            if self.last_segment_id is not None:
+                # maybe it was the last one still downloading
+                self.check_download_finished(current_time)
+                return
 
             # still have space in buffer to download next ss
-            if self.get_amount_of_video_to_play() >= self.max_buffer_size:
+            if not self.has_buffer_space():
+                if self.inflight_segments:
+                    # the next response asks for more segments
+                    return
+
                 print(
                     f'Execution Time {current_time} Maximum buffer size is achieved... the principal process will sleep now.')
-                self.player_thread_events.wait()
-
-            self.request_next_segment()
+                self.waiting_buffer_space = True
+                self.schedule_resume()
+                return
 
-            '''
-            if not self.is_buffer_achieve_max_size():
-                self.request_next_segment()
-            else:
-                print('terminou o download... vamos encerrar')
-                self.kill_playback_thread = True
-                self.playback_thread.join()
-            '''
+            self.request_next_segments()
         else:
-            print(f'Execution Time {current_time} All video\'s segments was downloaded')
-            self.kill_playback_thread = True
-            if self.playback_thread.is_alive():
-                self.playback_thread.join()
+            if self.last_segment_id is None or msg.get_segment_id() <= self.last_segment_id:
+                self.last_segment_id = msg.get_segment_id() - 1
+
+            self.check_download_finished(current_time)
+
+    def check_download_finished(self, current_time):
+        """
+        Once the last segment is known, the download is finished when no
+        segment is being downloaded and every one up to the last is in the
+        buffer, so an empty buffer is the end of the video, not a pause.
+        """
+        if self.inflight_segments or self.next_buffered_segment_id <= self.last_segment_id:
+            return
+
+        print(f'Execution Time {current_time} All video\'s segments was downloaded')
+        self.download_finished = True
+
+        # a video shorter than buffering_until is played anyway
+        if self.buffer_initialization:
+            self.buffer_initialization = False
+            self.start_playback(current_time)
 
     def logging_all_statistics(self):
         self.log(self.playback_quality_qi, 'playback_quality_qi', 'Quality QI', 'bps')
@@ -304,28 +468,32 @@ class Player(SimpleModule):
         self.log(self.playback_qi, 'playback_qi', 'Quality Index', 'QI')
         self.log(self.playback_buffer_size, 'playback_buffer_size', 'Buffer Size', 'seconds')
         self.log(self.throughput, 'throughput', 'Throughput Variation', 'bps')
+        self.log(self.abandoned_bytes, 'abandoned_bytes', 'Abandoned Downloads', 'wasted bytes')
 
     def log(self, log, file_name, title, y_axis, x_axis='execution time (s)'):
-        items = log.items
+        if len(log) == 0:
+            return
+
+        # the DashClient saves (and maybe draws) it after the finalization
+        self.session.results.add_plot(file_name, [(file_name, *log.get_series())], title, y_axis, x_axis)
 
-        if len(items) == 0:
+    def handle_self_message(self, msg):
+        if msg is not self.playback_event and msg is not self.resume_event:
+            # rescheduled meanwhile
             return
 
-        x = []
-        y = []
-        for i in range(len(items)):
-            x.append(items[i][0])
-            y.append(items[i][1])
-
-        plt.plot(x, y, label=file_name)
-        plt.xlabel(x_axis)
-        plt.ylabel(y_axis)
-        plt.title(title)
-
-        plt.savefig(f'./results/{file_name}.png')
-        plt.clf()
-        plt.cla()
-        plt.close()
+        self.advance_playback(self.timer.get_current_time())
+
+        if msg is self.resume_event:
+            if self.has_buffer_space():
+                self.waiting_buffer_space = False
+                self.resume_event = None
+                self.request_next_segments()
+            else:
+                # the playback step was shorter than expected (e.g. a pause)
+                self.schedule_resume()
+
+        self.schedule_playback()
 
     def handle_xml_request(self, msg):
         # not applied
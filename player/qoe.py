@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+Online QoE metrics. The Player updates them, in O(1), at each played
+second, stall and segment arrival, so they are available at any time
+(the R2As read them through the Whiteboard) and nothing has to scan the
+statistics history at the end of the run.
+
+The score is the linear QoE of Yin et al. (A Control-Theoretic Approach
+for Dynamic Adaptive Video Streaming over HTTP, SIGCOMM 2015), per
+played second: the average bitrate minus the switches magnitude and the
+rebuffering and startup times, weighted in Mbps.
+"""
+
+
+class QoEMetrics:
+
+    # weights of the score, Mbps per Mbps of switch and per second of stall or startup
+    SWITCH_WEIGHT = 1
+    REBUFFER_WEIGHT = 4.3
+    STARTUP_WEIGHT = 4.3
+
+    def __init__(self):
+        self.started_at = None
+        self.startup_delay = None
+
+        # played seconds, sum of their qi and of their bitrate (bps)
+        self.played_time = 0
+        self.qi_sum = 0
+        self.bitrate_sum = 0
+
+        self.last_qi = None
+        self.last_bitrate = None
+        self.switches = 0
+        # sum of |bitrate changes| (bps)
+        self.switches_magnitude = 0
+
+        self.stall_started_at = None
+        self.rebuffer_count = 0
+        self.rebuffer_time = 0
+
+        self.segments = 0
+        self.downloaded_bits = 0
+        self.download_time = 0
+
+    def add_session_start(self, t):
+        self.started_at = t
+
+    def add_playback_start(self, t):
+        """
+        The first one is the end of the startup, the next ones end a stall.
+        """
+        if self.startup_delay is None:
+            self.startup_delay = t - (self.started_at or 0)
+        elif self.stall_started_at is not None:
+            self.rebuffer_time += t - self.stall_started_at
+            self.stall_started_at = None
+
+    def add_stall(self, t):
+        self.stall_started_at = t
+        self.rebuffer_count += 1
+
+    def add_played(self, qi, bitrate, seconds=1):
+        self.played_time += seconds
+        self.qi_sum += qi * seconds
+        self.bitrate_sum += bitrate * seconds
+
+        if self.last_qi is not None and qi != self.last_qi:
+            self.switches += 1
+            self.switches_magnitude += abs(bitrate - self.last_bitrate)
+
+        self.last_qi = qi
+        self.last_bitrate = bitrate
+
+    def add_segment(self, bits, download_time):
+        self.segments += 1
+        self.downloaded_bits += bits
+        self.download_time += download_time
+
+    def get_average_qi(self):
+        return self.qi_sum / self.played_time if self.played_time else 0
+
+    def get_average_bitrate(self):
+        return self.bitrate_sum / self.played_time if self.played_time else 0
+
+    def get_rebuffer_ratio(self):
+        """
+        It returns the share of the session (playing or stalled) spent stalled.
+        """
+        total_time = self.played_time + self.rebuffer_time
+        return self.rebuffer_time / total_time if total_time else 0
+
+    def get_score(self):
+        """
+        It returns the linear QoE per played second, in Mbps.
+        """
+        if not self.played_time:
+            return 0
+
+        score = (self.bitrate_sum - self.SWITCH_WEIGHT * self.switches_magnitude) / 1e6
+        score -= self.REBUFFER_WEIGHT * self.rebuffer_time + self.STARTUP_WEIGHT * (self.startup_delay or 0)
+        return score / self.played_time
+
+    def get_metrics(self):
+        """
+        It returns a dict with the current value of every metric.
+        """
+        return {
+            'played_time': self.played_time,
+            'average_qi': self.get_average_qi(),
+            'average_bitrate': self.get_average_bitrate(),
+            'switches': self.switches,
+            'average_switch_magnitude': self.switches_magnitude / self.switches if self.switches else 0,
+            'startup_delay': self.startup_delay,
+            'rebuffer_count': self.rebuffer_count,
+            'rebuffer_time': self.rebuffer_time,
+            'rebuffer_ratio': self.get_rebuffer_ratio(),
+            'segments': self.segments,
+            'average_throughput': self.downloaded_bits / self.download_time if self.download_time else 0,
+            'score': self.get_score(),
+        }
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+Throughput estimators updated in O(1) at each segment download, and
+published by the Player on the Whiteboard, so every R2A gets the same
+statistics without going through its own history:
+
+- the arithmetic and harmonic means of the last samples (sliding window);
+- an EWMA whose half-life is given in seconds of download, as dash.js
+  does, so a long download weighs more than a short one;
+- streaming quantiles, with the P-square algorithm (Jain and Chlamtac,
+  The P2 Algorithm for Dynamic Calculation of Quantiles and Histograms
+  Without Storing Observations, 1985), in constant memory.
+"""
+
+from bisect import insort
+from collections import deque
+
+
+class WindowMean:
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=max(1, size))
+        self.sum = 0
+        self.inverse_sum = 0
+
+    def add(self, value):
+        if len(self.samples) == self.samples.maxlen:
+            oldest = self.samples[0]
+            self.sum -= oldest
+            self.inverse_sum -= 1 / oldest
+
+        self.samples.append(value)
+        self.sum += value
+        self.inverse_sum += 1 / value
+
+    def get_mean(self):
+        return self.sum / len(self.samples) if self.samples else None
+
+    def get_harmonic_mean(self):
+        return len(self.samples) / self.inverse_sum if self.samples else None
+
+
+class Ewma:
+
+    def __init__(self, half_life):
+        self.half_life = half_life
+        self.estimate = 0
+        self.total_weight = 0
+
+    def add(self, value, weight=1):
+        """
+        Adds a sample weighing weight (seconds of download).
+        """
+        decay = 0.5 ** (weight / self.half_life)
+        self.estimate = decay * self.estimate + (1 - decay) * value
+        self.total_weight += weight
+
+    def get_estimate(self):
+        """
+        It returns the estimate corrected for the zero it started from.
+        """
+        if self.total_weight == 0:
+            return None
+
+        return self.estimate / (1 - 0.5 ** (self.total_weight / self.half_life))
+
+
+class P2Quantile:
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        # marker heights and actual/desired positions (1 based)
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, value):
+        self.count += 1
+        q, n = self.heights, self.positions
+
+        # the first five samples are the initial markers
+        if self.count <= 5:
+            insort(q, value)
+            return
+
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+
+                height = self.parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+
+                q[i] = height
+                n[i] += d
+
+    def parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def get_estimate(self):
+        if self.count == 0:
+            return None
+
+        if self.count <= 5:
+            # still the samples themselves, interpolated as numpy.quantile does
+            position = self.p * (self.count - 1)
+            low = int(position)
+            high = min(low + 1, self.count - 1)
+            return self.heights[low] + (position - low) * (self.heights[high] - self.heights[low])
+
+        return self.heights[2]
+
+
+class ThroughputEstimators:
+
+    def __init__(self, window_size, half_life, quantiles):
+        self.last = None
+        self.count = 0
+        self.window = WindowMean(window_size)
+        self.ewma = Ewma(half_life)
+        self.quantiles = {p: P2Quantile(p) for p in quantiles}
+
+    def add(self, throughput, download_time):
+        """
+        Adds the throughput (bps) measured by a download of download_time seconds.
+        """
+        if throughput <= 0:
+            return
+
+        self.last = throughput
+        self.count += 1
+        self.window.add(throughput)
+        self.ewma.add(throughput, download_time)
+        for quantile in self.quantiles.values():
+            quantile.add(throughput)
+
+    def get_quantile(self, p):
+        """
+        It returns the p quantile, p must be one of the 'throughput_quantiles' parameter.
+        """
+        return self.quantiles[p].get_estimate()
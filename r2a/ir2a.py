@@ -8,21 +8,113 @@ Abstract Class for R2A (Rate Adaptation Algorithms) implementations
 
 It is necessary to implement all the @abstractmethod methods to generate a new R2A Algorithm implementation
 
+The Player may keep several segments downloading at the same time
+('max_inflight_segments' parameter). IR2A tracks the requests sent down
+and not answered yet, see get_outstanding_segments() and
+get_outstanding_bits().
+
+While a segment is downloading, the ConnectionHandler asks should_abandon()
+whether it must be abandoned and requested again with a lower quality_id.
+
 """
 
 from base.simple_module import SimpleModule
 from abc import ABCMeta, abstractmethod
 from base.message import Message, MessageKind
-from base.whiteboard import Whiteboard
+from player.out_vector import OutVector, get_retention
+from player.parser import parse_mpd
 
 
 class IR2A(SimpleModule):
 
-    def __init__(self, id):
-        SimpleModule.__init__(self, id)
+    def __init__(self, id, session=None):
+        SimpleModule.__init__(self, id, session)
 
         # Whiteboard object to change statistical information between Player and R2A algorithm
-        self.whiteboard = Whiteboard.get_instance()
+        self.whiteboard = self.session.whiteboard
+
+        # clock shared with the Player, it may be a virtual one
+        self.timer = self.session.timer
+
+        # segment requests sent to the ConnectionHandler and not received yet, by segment_id
+        self.outstanding_segments = {}
+
+        # the default abandonment policy is only applied if 'segment_abandonment' is set
+        self.segment_abandonment = self.session.config_parser.get_boolean_parameter('segment_abandonment')
+        # the throughput measured before this time (s) is too noisy to abandon a download
+        self.abandonment_min_elapsed_time = 0.5
+        # quality_id list of the MPD, known when the xml response goes up
+        self.available_qi = []
+
+    def create_history(self, name, typecode='d'):
+        """
+        It returns an OutVector for a history of the algorithm, its memory is
+        bounded by the 'retention' parameter of name (see out_vector.py).
+        """
+        config_parser = self.session.config_parser
+        return OutVector(typecode, retention=get_retention(config_parser, name),
+                         summaries_size=int(config_parser.get_parameter('retention_summaries')))
+
+    def send_down(self, msg, delay=0):
+        if msg.get_kind() == MessageKind.SEGMENT_REQUEST:
+            self.outstanding_segments[msg.get_segment_id()] = msg
+            msg.add_abandonment_policy(self.should_abandon)
+        SimpleModule.send_down(self, msg, delay)
+
+    def send_up(self, msg, delay=0):
+        if msg.get_kind() == MessageKind.SEGMENT_RESPONSE:
+            self.outstanding_segments.pop(msg.get_segment_id(), None)
+        elif msg.get_kind() == MessageKind.XML_RESPONSE and self.segment_abandonment:
+            self.available_qi = parse_mpd(msg.get_payload()).get_qi()
+        SimpleModule.send_up(self, msg, delay)
+
+    def should_abandon(self, msg, received_length, elapsed_time, buffer_level):
+        """
+        Called by the ConnectionHandler after each chunk of msg is received,
+        with the bytes received so far, the time (s) since its transfer
+        started on the link (see SSMessage.get_transfer_started_at()) and
+        the seconds of video in the buffer. It returns the
+        quality_id msg must be requested again with, or None to go on.
+
+        By default, a download that would end after the buffer runs out is
+        abandoned if a lower quality_id, downloaded again from the start
+        at the throughput measured so far, ends sooner.
+        """
+        if not self.segment_abandonment or elapsed_time < self.abandonment_min_elapsed_time or received_length == 0:
+            return None
+
+        segment_size = msg.get_segment_size()
+        throughput = 8 * received_length / elapsed_time
+        remaining_time = (msg.get_quality_id() * segment_size - 8 * received_length) / throughput
+        if remaining_time <= buffer_level:
+            return None
+
+        lower_qi = [qi for qi in self.available_qi if qi < msg.get_quality_id()]
+        if not lower_qi:
+            return None
+
+        # the best one that ends before the buffer runs out, or the fastest one
+        in_time = [qi for qi in lower_qi if qi * segment_size / throughput <= buffer_level]
+        if in_time:
+            return max(in_time)
+
+        if min(lower_qi) * segment_size / throughput < remaining_time:
+            return min(lower_qi)
+
+        return None
+
+    def get_outstanding_segments(self):
+        """
+        It returns the SSMessages of the segments being downloaded, ordered by segment_id.
+        """
+        return [self.outstanding_segments[i] for i in sorted(self.outstanding_segments)]
+
+    def get_outstanding_bits(self):
+        """
+        It returns how many bits are still expected from the segments being
+        downloaded, estimated from their quality_id and duration.
+        """
+        return sum(msg.get_quality_id() * msg.get_segment_size() for msg in self.outstanding_segments.values())
 
     @abstractmethod
     def handle_xml_request(self, msg):
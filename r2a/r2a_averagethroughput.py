@@ -1,19 +1,19 @@
 from r2a.ir2a import IR2A
 from player.parser import *
-import time
-from statistics import mean
 
 
 class R2A_AverageThroughput(IR2A):
 
-    def __init__(self, id):
-        IR2A.__init__(self, id)
-        self.throughputs = []
+    def __init__(self, id, session=None):
+        IR2A.__init__(self, id, session)
+        # the mean of every throughput measured, kept as a running sum
+        self.throughputs_sum = 0
+        self.throughputs_count = 0
         self.request_time = 0
         self.qi = []
 
     def handle_xml_request(self, msg):
-        self.request_time = time.perf_counter()
+        self.request_time = self.timer.get_current_time()
         self.send_down(msg)
 
     def handle_xml_response(self, msg):
@@ -21,14 +21,13 @@ class R2A_AverageThroughput(IR2A):
         parsed_mpd = parse_mpd(msg.get_payload())
         self.qi = parsed_mpd.get_qi()
 
-        t = time.perf_counter() - self.request_time
-        self.throughputs.append(msg.get_bit_length() / t)
+        t = self.timer.get_current_time() - self.request_time
+        self.add_throughput(msg.get_bit_length() / t)
 
         self.send_up(msg)
 
     def handle_segment_size_request(self, msg):
-        self.request_time = time.perf_counter()
-        avg = mean(self.throughputs) / 2
+        avg = self.throughputs_sum / self.throughputs_count / 2
 
         selected_qi = self.qi[0]
         for i in self.qi:
@@ -39,10 +38,14 @@ class R2A_AverageThroughput(IR2A):
         self.send_down(msg)
 
     def handle_segment_size_response(self, msg):
-        t = time.perf_counter() - self.request_time
-        self.throughputs.append(msg.get_bit_length() / t)
+        t = self.timer.get_current_time() - msg.get_transfer_started_at()
+        self.add_throughput(msg.get_bit_length() / t)
         self.send_up(msg)
 
+    def add_throughput(self, throughput):
+        self.throughputs_sum += throughput
+        self.throughputs_count += 1
+
     def initialize(self):
         pass
 
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 03/11/2020
+
+@description: PyDash Project
+
+Runs the R2A algorithm of the 'process_r2a_algorithm' parameter in a
+worker process, so a CPU-heavy one (e.g. model predictive control or a
+learned predictor) doesn't hold the GIL of the Player.
+
+Every message the R2A receives is sent to the worker through a Pipe,
+and the worker algorithm handles it on its own Session: a virtual clock
+set to the time of the message and a SharedWhiteboardReader of the
+Whiteboard of this process, updated before each message. Only the
+segment requests wait for the answer, the quality_id chosen by the
+worker. This wait is the decision latency, recorded at each request
+(see get_summary()).
+
+At the end, the plots of the worker algorithm are brought back to the
+Results of this Session.
+
+If the worker exits (e.g. the algorithm raised an error), the next wait
+for it raises a RuntimeError with its exit code instead of blocking,
+and the shared memory is released.
+
+The abandonment policy runs in this process, during the download, so
+it is the default one of IR2A (see IR2A.should_abandon()). With
+'segment_abandonment' set, an algorithm with its own should_abandon()
+can't run in the worker.
+"""
+
+import copy
+import multiprocessing
+import time
+
+from base.message import MessageKind, SSMessage
+from r2a.ir2a import IR2A
+
+# seconds between the checks of the worker while its answer is awaited
+worker_poll_interval = 0.1
+
+
+def run_worker(connection, config_parameters, shared_whiteboard_name):
+    # only imported in the worker process
+    import contextlib
+    import importlib
+
+    from base.session import Session
+    from base.shared_whiteboard import SharedWhiteboardReader
+
+    config_parameters = dict(config_parameters, clock='virtual')
+    session = Session.from_parameters(config_parameters)
+    session.whiteboard = SharedWhiteboardReader(shared_whiteboard_name,
+                                                int(config_parameters['process_r2a_history']),
+                                                [float(p) for p in config_parameters['throughput_quantiles']])
+
+    r2a_algorithm = str(config_parameters['process_r2a_algorithm'])
+    r2a_class = getattr(importlib.import_module('r2a.' + r2a_algorithm.lower()), r2a_algorithm)
+    r2a = r2a_class(1, session)
+
+    # the policy of this process would never be asked, see forward()
+    if r2a.segment_abandonment and r2a_class.should_abandon is not IR2A.should_abandon:
+        raise ValueError(f'{r2a_algorithm} has its own abandonment policy, it can\'t run in the R2AProcess '
+                         f'worker with the segment_abandonment parameter set')
+
+    with contextlib.closing(session.whiteboard):
+        while True:
+            command, t, msg = connection.recv()
+            session.timer.virtual_time = t
+
+            if command == 'initialize':
+                super(type(r2a), r2a).initialize()
+                r2a.initialize()
+                connection.send('ready')
+            elif command == 'message':
+                r2a.handle_message(msg)
+
+                # the messages sent up or down are the answer of this process
+                while not session.scheduler.is_empty():
+                    session.scheduler.get_event()
+
+                if msg.get_kind() == MessageKind.SEGMENT_REQUEST:
+                    connection.send(msg.get_quality_id())
+            elif command == 'finalization':
+                super(type(r2a), r2a).finalization()
+                r2a.finalization()
+                connection.send(session.results.plots)
+                break
+
+
+class R2AProcess(IR2A):
+
+    def __init__(self, id, session=None):
+        IR2A.__init__(self, id, session)
+
+        config_parser = self.session.config_parser
+        self.history_capacity = int(config_parser.get_parameter('process_r2a_history'))
+        self.quantiles = [float(p) for p in config_parser.get_parameter('throughput_quantiles')]
+
+        self.shared_whiteboard = None
+        self.worker = None
+        self.connection = None
+
+        # seconds waited for each quality decision of the worker
+        self.decision_latency = self.create_history('decision_latency')
+        self.max_decision_latency = 0
+
+    def initialize(self):
+        # numpy is only needed by this R2A
+        from base.shared_whiteboard import SharedWhiteboard
+
+        self.shared_whiteboard = SharedWhiteboard(self.whiteboard, self.history_capacity, self.quantiles)
+
+        # spawn: the worker doesn't inherit the connection threads
+        context = multiprocessing.get_context('spawn')
+        self.connection, worker_connection = context.Pipe()
+        self.worker = context.Process(target=run_worker, daemon=True, args=(
+            worker_connection, self.session.config_parser.config_parameters, self.shared_whiteboard.get_name()))
+        try:
+            self.worker.start()
+            # only the worker writes to its end, so the pipe is closed when it exits
+            worker_connection.close()
+
+            # the worker start up isn't a decision latency
+            self.send('initialize', None)
+            self.receive()
+        except BaseException:
+            self.shared_whiteboard.unlink()
+            raise
+
+    def send(self, command, msg):
+        try:
+            self.connection.send((command, self.timer.get_current_time(), msg))
+            return
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+        # the worker closed the pipe exiting
+        self.raise_worker_error()
+
+    def receive(self):
+        """
+        It returns the next answer of the worker. It raises RuntimeError if
+        the worker exits instead.
+        """
+        while not self.connection.poll(worker_poll_interval):
+            if not self.worker.is_alive():
+                self.raise_worker_error()
+
+        try:
+            return self.connection.recv()
+        except (EOFError, ConnectionResetError):
+            pass
+
+        # the worker closed the pipe exiting
+        self.raise_worker_error()
+
+    def raise_worker_error(self):
+        # the exit code is only known after the worker is joined
+        self.worker.join(worker_poll_interval)
+        self.shared_whiteboard.unlink()
+        raise RuntimeError(f'the R2AProcess worker ({self.session.config_parser.get_parameter("process_r2a_algorithm")}) '
+                           f'exited with code {self.worker.exitcode}')
+
+    def forward(self, msg):
+        """
+        Sends msg to the worker, after the Whiteboard it will read.
+        """
+        self.shared_whiteboard.update()
+
+        # the abandonment policy is a method of this process
+        msg = copy.copy(msg)
+        if isinstance(msg, SSMessage):
+            msg.add_abandonment_policy(None)
+        self.send('message', msg)
+
+    def handle_xml_request(self, msg):
+        self.forward(msg)
+        self.send_down(msg)
+
+    def handle_xml_response(self, msg):
+        self.forward(msg)
+        self.send_up(msg)
+
+    def handle_segment_size_request(self, msg):
+        started_at = time.perf_counter()
+        self.forward(msg)
+        quality_id = self.receive()
+        latency = time.perf_counter() - started_at
+        self.decision_latency.add(self.timer.get_current_time(), latency)
+        self.max_decision_latency = max(self.max_decision_latency, latency)
+
+        msg.add_quality_id(quality_id)
+        self.send_down(msg)
+
+    def handle_segment_size_response(self, msg):
+        self.forward(msg)
+        self.send_up(msg)
+
+    def finalization(self):
+        try:
+            self.send('finalization', None)
+            self.session.results.add_plots(self.receive())
+            self.worker.join()
+        finally:
+            self.shared_whiteboard.unlink()
+
+        self.session.results.add_plot('decision_latency', [('decision_latency', *self.decision_latency.get_series())],
+                                      'Decision Latency', 'seconds', 'execution time (s)')
+
+        summary = self.get_summary()
+        print(f'Decision latency: mean {summary["decision_latency_mean"]} s, max {summary["decision_latency_max"]} s')
+
+    def get_summary(self):
+        """
+        It returns a dict with the decision latency statistics.
+        """
+        decisions = self.decision_latency.get_count()
+
+        return {
+            'process_r2a_algorithm': self.session.config_parser.get_parameter('process_r2a_algorithm'),
+            'decisions': decisions,
+            'decision_latency_mean': round(self.decision_latency.get_sum() / decisions, 6) if decisions else 0,
+            'decision_latency_max': round(self.max_decision_latency, 6),
+        }
@@ -22,8 +22,8 @@ from r2a.ir2a import IR2A
 
 class R2ARandom(IR2A):
 
-    def __init__(self, id):
-        IR2A.__init__(self, id)
+    def __init__(self, id, session=None):
+        IR2A.__init__(self, id, session)
         self.parsed_mpd = ''
         self.qi = []
 
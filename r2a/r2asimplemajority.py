@@ -1,18 +1,14 @@
 from collections import Counter
 from re import search
-from time import perf_counter
 
-from matplotlib import pyplot
-
-from base.configuration_parser import ConfigurationParser
 from player.parser import parse_mpd
 from r2a.ir2a import IR2A
 
 
 class R2ASimpleMajority(IR2A):
     """ABR algorithm based on throughput comparison votes by simple majority."""
-    def __init__(self, id):
-        super().__init__(id)
+    def __init__(self, id, session=None):
+        super().__init__(id, session)
 
         # Throuhput buffer size bounderies
         self.MIN_THROUGHPUT_BUFFER_SZ = 1
@@ -34,16 +30,13 @@ class R2ASimpleMajority(IR2A):
         self.qi = []
         self.qi_id = None
 
-        # Intermediate to calculate the current throughput
-        self.elapsed_time = None
-
         # Throughput buffer control
         self.throughput_buffer_size = 0
         self.throughput_buffer = []
 
         # History
-        self.throughputs = []
-        self.comp_throughputs = []
+        self.throughputs = self.create_history('throughputs')
+        self.comp_throughputs = self.create_history('comp_throughputs')
 
     def handle_xml_request(self, msg):
         self.send_down(msg)
@@ -57,14 +50,13 @@ class R2ASimpleMajority(IR2A):
     def handle_segment_size_request(self, msg):
         msg.add_quality_id(self.qi[self.qi_id])
 
-        self.elapsed_time = perf_counter()
-
         self.send_down(msg)
 
     def handle_segment_size_response(self, msg):
-        self.elapsed_time = perf_counter() - self.elapsed_time
+        # each response has its own time, the segments may be pipelined
+        elapsed_time = self.timer.get_current_time() - msg.get_transfer_started_at()
 
-        self._performance_analyses(msg.bit_length)
+        self._performance_analyses(msg.bit_length, elapsed_time)
 
         self._set_next_qi_id()
 
@@ -72,7 +64,7 @@ class R2ASimpleMajority(IR2A):
 
     def initialize(self):
         """Calculating the buffer size, based on segment periods"""
-        settings = ConfigurationParser.get_instance()
+        settings = self.session.config_parser
         period = int(search(r'(\d+)sec', settings.get_parameter('url_mpd')).groups()[0])
 
         self.throughput_buffer_size = max(self.MIN_THROUGHPUT_BUFFER_SZ, self.MAX_THROUGHPUT_BUFFER_SZ // period)
@@ -92,7 +84,7 @@ class R2ASimpleMajority(IR2A):
             'throughput_v2',
         )
 
-    def _performance_analyses(self, bit_length):
+    def _performance_analyses(self, bit_length, elapsed_time):
         """Calculating the current throughput and checking its proportion
         to the current quality bitrate as follow:
 
@@ -102,11 +94,12 @@ class R2ASimpleMajority(IR2A):
 
         Args:
         - `int:bit_lenght`: Response lenght in bits
+        - `float:elapsed_time`: Response download time in seconds
         """
-        c_throughput = bit_length // self.elapsed_time
-        self.throughputs.append(c_throughput)
+        c_throughput = bit_length // elapsed_time
+        self.throughputs.add(self.throughputs.get_count(), c_throughput)
         c_throughput = round(c_throughput / self.qi[self.qi_id], 3)
-        self.comp_throughputs.append(c_throughput)
+        self.comp_throughputs.add(self.comp_throughputs.get_count(), c_throughput)
 
         if c_throughput < 1 - self.STABILITY_DOWN:
             self.throughput_buffer.append(self.DECREASE_BPS)
@@ -143,21 +136,6 @@ class R2ASimpleMajority(IR2A):
         return distribution[0][0]
 
     def _plot(self, data, file_name, title, y_label, x_label='histórico'):
-        """Plotting data into a .PNG image."""
-        for axis, label in data:
-            x_axis, y_axis = [], []
-
-            for i, value in enumerate(axis):
-                x_axis.append(i)
-                y_axis.append(value)
-
-            pyplot.plot(x_axis, y_axis, label=label)
-            pyplot.xlabel(x_label)
-            pyplot.ylabel(y_label)
-
-        pyplot.legend()
-        pyplot.title(title)
-        pyplot.savefig(f'./results/{self.__class__.__name__}_{file_name}.png')
-        pyplot.clf()
-        pyplot.cla()
-        pyplot.close()
+        """Adding the data to the session results, drawn as a .PNG image."""
+        lines = [(label, *axis.get_series()) for axis, label in data]
+        self.session.results.add_plot(f'{self.__class__.__name__}_{file_name}', lines, title, y_label, x_label)
@@ -1,9 +1,5 @@
 from datetime import datetime
 from math import exp
-from time import perf_counter
-
-from matplotlib import pyplot
-from numpy import abs, asarray
 
 from player.parser import parse_mpd
 from r2a.ir2a import IR2A
@@ -15,8 +11,8 @@ class R2ATruong(IR2A):
     Authors: Truong Cong Thang, Member, IEEE, Quang-Dung Ho, Jung Won Kang,
     Anh T. Pham, Senior Member, IEEE
     """
-    def __init__(self, id):
-        super().__init__(id)
+    def __init__(self, id, session=None):
+        super().__init__(id, session)
 
         self.INITIAL_QI_ID = .65
 
@@ -30,8 +26,9 @@ class R2ATruong(IR2A):
         self.qi = []
         self.qi_id = 0
 
-        self.throughputs = []
-        self.estimated_throughputs = []
+        # by sample index
+        self.throughputs = self.create_history('throughputs')
+        self.estimated_throughputs = self.create_history('estimated_throughputs')
 
         self.smoother = 0
         self.normalizer = 0
@@ -53,12 +50,10 @@ class R2ATruong(IR2A):
 
         self._feature_extraction()
 
-        self.elapsed_time = perf_counter()
-
         self.send_down(msg)
 
     def handle_segment_size_response(self, msg):
-        self.elapsed_time = perf_counter() - self.elapsed_time
+        self.elapsed_time = self.timer.get_current_time() - msg.get_transfer_started_at()
 
         self._controller(msg.bit_length)
 
@@ -79,50 +74,37 @@ class R2ATruong(IR2A):
         )
 
     def _feature_extraction(self):
-        if not self.throughputs:
+        if not self.throughputs.get_count():
             return
 
-        self.normalizer = abs(self.throughputs[-1]  - self.estimated_throughputs[-1]) / self.estimated_throughputs[-1]
+        estimated_throughput = self.estimated_throughputs.get_last()
+        self.normalizer = abs(self.throughputs.get_last() - estimated_throughput) / estimated_throughput
 
         self.smoother = 1 / (1 + exp(-(self.LOGISTIC_GROWTH_RATE * (self.normalizer - self.LOGISTIC_MIDPOINT))))
 
     def _controller(self, bit_length):
-        self.throughputs.append(bit_length // self.elapsed_time)
-
-        throughput_buffer_sz = len(self.throughputs)
+        throughput_buffer_sz = self.throughputs.get_count()
+        self.throughputs.add(throughput_buffer_sz, bit_length // self.elapsed_time)
+        throughput_buffer_sz += 1
 
         if throughput_buffer_sz == 1:
-            self.estimated_throughputs.append(self.throughputs[-1])
+            estimated_throughput = self.throughputs.get_last()
         elif throughput_buffer_sz <= 3:
-            self.estimated_throughputs.append(self.throughputs[-2])
+            estimated_throughput = self.throughputs.get_last(2)
         else:
-            self.estimated_throughputs.append(
-                ((1 - self.smoother) * self.estimated_throughputs[-2]) + (self.smoother * self.throughputs[-2])
-            )
+            estimated_throughput = (((1 - self.smoother) * self.estimated_throughputs.get_last(2)) +
+                                    (self.smoother * self.throughputs.get_last(2)))
+
+        self.estimated_throughputs.add(throughput_buffer_sz - 1, estimated_throughput)
 
     def _throughput_estimation(self):
-        bitrate = (1 - self.SAFETY_MARGIN) * self.estimated_throughputs[-1]
+        bitrate = (1 - self.SAFETY_MARGIN) * self.estimated_throughputs.get_last()
 
         self.qi_id = self._nth_closest(bitrate)
 
     def _nth_closest(self, bitrate):
-        return abs(asarray(self.qi) - bitrate).argmin()
+        return min(range(len(self.qi)), key=lambda i: abs(self.qi[i] - bitrate))
 
     def _plot(self, data, file_name, title, y_label, x_label='histórico'):
-        for axis, label in data:
-            x_axis, y_axis = [], []
-
-            for i, value in enumerate(axis):
-                x_axis.append(i)
-                y_axis.append(value)
-
-            pyplot.plot(x_axis, y_axis, label=label)
-            pyplot.xlabel(x_label)
-            pyplot.ylabel(y_label)
-
-        pyplot.legend()
-        pyplot.title(title)
-        pyplot.savefig(f'./results/{file_name}_{self.log_time}.png')
-        pyplot.clf()
-        pyplot.cla()
-        pyplot.close()
+        lines = [(label, *axis.get_series()) for axis, label in data]
+        self.session.results.add_plot(f'{file_name}_{self.log_time}', lines, title, y_label, x_label)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+Records the MPD and the size of every segment of a DASH dataset into
+a SegmentIndex file, used later by the offline mode ('dataset_index'
+parameter), so the runs don't depend on the web server anymore.
+
+Usage: python3 record_dataset.py <index file> [url_mpd]
+
+url_mpd defaults to the one in dash_client.json.
+"""
+
+import json
+import sys
+
+from base.message import MessageKind, SSMessage
+from connection.connection_pool import ConnectionPool
+from connection.segment_index import SegmentIndex
+from player.parser import navigate_mpd, parse_mpd
+
+
+def get_segment_size(connection_pool, host_name, port, path_name):
+    """
+    It returns the segment size in bytes, or 0 if it doesn't exist.
+    """
+    connection, response, _ = connection_pool.request(host_name, port, path_name, method='HEAD')
+    response.read()
+    connection_pool.release(host_name, port, connection)
+
+    if response.status != 200:
+        return 0
+
+    content_length = response.getheader('Content-Length')
+    if content_length is not None:
+        return int(content_length)
+
+    # the server didn't say it, so the segment has to be downloaded
+    status, ss_file, _ = connection_pool.get(host_name, port, path_name)
+    return len(ss_file) if status == 200 else 0
+
+
+def record(url_mpd, file_name):
+    port = '80'
+    url_tokens = url_mpd.split('/')
+    host_name = url_tokens[2]
+    connection_pool = ConnectionPool(1)
+
+    _, mpd, _ = connection_pool.get(host_name, port, '/' + '/'.join(url_tokens[3:]))
+    mpd = mpd.decode()
+    parsed_mpd = parse_mpd(mpd)
+    qi = parsed_mpd.get_qi()
+
+    sizes = {}
+    for quality_id in qi:
+        segment_id = 1
+        while True:
+            segment_request = SSMessage(MessageKind.SEGMENT_REQUEST)
+            segment_request.add_path_name('/'.join(url_tokens[:len(url_tokens) - 1]))
+            segment_request.add_media_mpd(navigate_mpd(parsed_mpd, 'media')[1])
+            segment_request.add_quality_id(quality_id)
+            segment_request.add_segment_id(segment_id)
+
+            segment_size = get_segment_size(connection_pool, host_name, port, segment_request.get_url())
+            if segment_size == 0:
+                break
+
+            sizes[(quality_id, segment_id)] = segment_size
+            segment_id += 1
+
+        print(f'> QI {quality_id}: {segment_id - 1} segments')
+
+    connection_pool.close_all()
+
+    segment_index = SegmentIndex(url_mpd, mpd, qi, max([s for _, s in sizes.keys()], default=0))
+    for (quality_id, segment_id), segment_size in sizes.items():
+        segment_index.add_segment_size(quality_id, segment_id, segment_size)
+    segment_index.save(file_name)
+
+    print(f'> {len(sizes)} segments recorded in {file_name}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('Usage: python3 record_dataset.py <index file> [url_mpd]')
+        exit(-1)
+
+    if len(sys.argv) > 2:
+        url_mpd = sys.argv[2]
+    else:
+        with open('dash_client.json') as f:
+            url_mpd = json.load(f)['url_mpd']
+
+    record(url_mpd, sys.argv[1])
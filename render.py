@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+Draws the results files (series.npz) saved by the sessions, e.g. with
+"plots": "deferred" or in a sweep. Each plot is drawn by a process of a
+pool, next to its results file, and the lines longer than max_points
+are downsampled (LTTB) before drawing.
+
+Usage: python3 render.py <results file or directory>... [--max-points N] [--workers N]
+
+A directory is searched (recursively) for results files. max_points
+defaults to 2000 and workers equal to 0 uses all cores.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from base.results import get_plot_names, load_results, render_plot, results_file_name
+
+
+def find_results_files(paths):
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+
+        for dir_path, _, file_names in os.walk(path):
+            if results_file_name in file_names:
+                files.append(os.path.join(dir_path, results_file_name))
+
+    return sorted(files)
+
+
+def render_file_plot(file_name, plot_name, max_points):
+    # each process loads its own plot, nothing big goes through the pool
+    [(_, plot, lines)] = load_results(file_name, [plot_name])
+    return render_plot(os.path.dirname(file_name), plot_name, plot, lines, max_points)
+
+
+def main(paths, max_points=2000, workers=0):
+    files = find_results_files(paths)
+
+    plots = []
+    for file_name in files:
+        plots += [(file_name, plot_name) for plot_name in get_plot_names(file_name)]
+
+    workers = workers or os.cpu_count()
+    print(f'Drawing {len(plots)} plots of {len(files)} results files over {workers} processes.')
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(render_file_plot, file_name, plot_name, max_points)
+                   for file_name, plot_name in plots]
+
+        for future in futures:
+            print(f'> {future.result()}')
+
+
+def pop_option(args, name, default):
+    if name not in args:
+        return default
+
+    i = args.index(name)
+    value = int(args[i + 1])
+    del args[i:i + 2]
+    return value
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    max_points = pop_option(args, '--max-points', 2000)
+    workers = pop_option(args, '--workers', 0)
+
+    if not args:
+        print('Usage: python3 render.py <results file or directory>... [--max-points N] [--workers N]')
+        exit(-1)
+
+    main(args, max_points, workers)
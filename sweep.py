@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+@author: Marcos F. Caetano (mfcaetano@unb.br) 11/03/2020
+
+@description: PyDash Project
+
+Parameter sweep runner. It runs one DashClient session for each
+combination of a grid of configuration parameters, spread over a
+process pool, and merges the summary of every run in a single table.
+
+Usage: python3 sweep.py sweep.json
+
+The grid spec is a json file like:
+
+{
+    "output_dir": "./sweep_results",
+    "workers": 0,
+    "base": {"clock": "virtual", "headless": true},
+    "grid": {
+        "r2a_algorithm": ["R2AFixed", "R2ATruong"],
+        "traffic_shaping_seed": ["1", "2", "3"]
+    }
+}
+
+"base" overrides dash_client.json for every run and "grid" lists the
+values of each swept parameter. "workers" equal to 0 uses all cores.
+Each run writes its statistics and log in its own output_dir/run_NNNN
+directory, and output_dir/summary.csv has one line per run.
+"""
+
+import contextlib
+import csv
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def build_runs(sweep_spec, base_parameters):
+    output_dir = sweep_spec.get('output_dir', './sweep_results')
+    grid = sweep_spec.get('grid', {})
+    keys = list(grid.keys())
+
+    runs = []
+    for i, values in enumerate(itertools.product(*[grid[k] for k in keys])):
+        config_parameters = dict(base_parameters)
+        config_parameters.update(sweep_spec.get('base', {}))
+        config_parameters.update(zip(keys, values))
+        config_parameters['results_dir'] = os.path.join(output_dir, f'run_{i:04d}')
+        runs.append((i, dict(zip(keys, values)), config_parameters))
+
+    return runs
+
+
+def run_session(config_parameters):
+    # imported here, so the parent process doesn't pay for it
+    from base.session import Session
+    from dash_client import DashClient
+
+    results_dir = config_parameters['results_dir']
+    os.makedirs(results_dir, exist_ok=True)
+
+    with open(os.path.join(results_dir, 'output.log'), 'w') as log:
+        with contextlib.redirect_stdout(log):
+            try:
+                dash_client = DashClient(Session.from_parameters(config_parameters))
+                dash_client.run_application()
+            except SystemExit as err:
+                # the pool would raise it again in the parent, stopping the sweep
+                raise RuntimeError(f'the session called exit({err.code})') from err
+
+    return dash_client.get_summary()
+
+
+def write_summary(file_name, rows):
+    columns = []
+    for row in rows:
+        columns += [k for k in row if k not in columns]
+
+    with open(file_name, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(sweep_file, config_file='dash_client.json'):
+    with open(sweep_file) as f:
+        sweep_spec = json.load(f)
+
+    with open(config_file) as f:
+        base_parameters = json.load(f)
+
+    runs = build_runs(sweep_spec, base_parameters)
+    output_dir = sweep_spec.get('output_dir', './sweep_results')
+    os.makedirs(output_dir, exist_ok=True)
+
+    workers = int(sweep_spec.get('workers', 0)) or os.cpu_count()
+    print(f'Running {len(runs)} sessions over {workers} processes.')
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_session, run[2]): run for run in runs}
+
+        for future in as_completed(futures):
+            run_id, swept_parameters, config_parameters = futures[future]
+            row = {'run': run_id}
+            row.update(swept_parameters)
+
+            try:
+                row.update(future.result())
+            except Exception as err:
+                # a run that calls exit() or raises doesn't stop the sweep, Ctrl-C does
+                row['error'] = repr(err)
+
+            print(f'> run {run_id} finished: {row}')
+            rows.append(row)
+
+    rows.sort(key=lambda row: row['run'])
+    write_summary(os.path.join(output_dir, 'summary.csv'), rows)
+    print(f'Summary written in {os.path.join(output_dir, "summary.csv")}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('Usage: python3 sweep.py <sweep spec json> [dash_client json]')
+        exit(-1)
+
+    main(*sys.argv[1:3])
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from connection.bandwidth_trace import BandwidthTrace, load_bandwidth_trace
+from convert_trace import convert
+
+samples = np.array([1e6, 2e6, 3e6, 4e6])
+
+
+@pytest.mark.parametrize('step, offset', [(1, 0), (0.1, 0.3), (0.3, 0.1), (0.7, 1.1)])
+def test_next_change_always_moves_forward(step, offset):
+    trace = BandwidthTrace(samples, step, offset)
+
+    t = 0
+    while t < 30:
+        next_change = trace.get_next_change(t)
+        assert t < next_change <= t + step + 1e-9
+        # the rate changes right at the returned bound
+        assert trace.get_position(next_change) == (trace.get_position(t) + 1) % len(samples)
+        t = next_change
+
+
+def test_finish_time_with_a_fractional_step():
+    trace = BandwidthTrace(samples, 0.1, 0.3)
+
+    # t=0 is 0.3s inside the trace: samples 4, 1, 2, 3, 4, ...
+    assert trace.get_rate(0) == 4e6
+    assert trace.get_next_change(0.2) == pytest.approx(0.3)
+    # 4e5 + 1e5 + 2e5 bits in the first 0.3s, then 3e5 bits at 3 Mbps
+    finished_at = trace.get_finish_time(0.0, 1e6)
+    assert finished_at == pytest.approx(0.4)
+    assert trace.get_bits_between(0.0, finished_at) == pytest.approx(1e6)
+
+
+def test_trace_without_loop_keeps_the_last_sample():
+    trace = BandwidthTrace(samples, 0.5, loop=False)
+    assert trace.get_rate(1.9) == 4e6
+    assert trace.get_rate(100) == 4e6
+
+    with pytest.raises(ValueError):
+        BandwidthTrace(np.array([1e6, 0]), loop=False)
+
+
+def test_converted_trace_is_loaded(tmp_path):
+    text_file_name = tmp_path / 'trace.txt'
+    text_file_name.write_text('# kbps\n0, 1000\n1, 2500\n\n2, 0\n')
+    file_name = str(tmp_path / 'trace.npy')
+
+    convert(text_file_name, file_name, 1000)
+    trace = BandwidthTrace(load_bandwidth_trace(file_name))
+    assert [trace.get_rate(t) for t in (0, 1, 2, 3)] == [1e6, 2.5e6, 0, 1e6]
+
+
+@pytest.mark.parametrize('text', ['1000\n-1\n', '0\n0\n', '1000\nnan\n'])
+def test_convert_rejects_traces_that_might_never_finish(tmp_path, text):
+    text_file_name = tmp_path / 'trace.txt'
+    text_file_name.write_text(text)
+
+    with pytest.raises(ValueError):
+        convert(text_file_name, str(tmp_path / 'trace.npy'))
+    assert not (tmp_path / 'trace.npy').exists()
@@ -0,0 +1,29 @@
+from player.out_vector import OutVector
+
+
+def test_to_csv_writes_every_sample(tmp_path):
+    out_vector = OutVector('q', capacity=2)
+    samples = [(0.1, 3), (0.30000000000000004, -7), (1e-7, 2 ** 62)]
+    for t, item in samples:
+        out_vector.add(t, item)
+
+    file_name = tmp_path / 'out.csv'
+    out_vector.to_csv(file_name, header=('t', 'buffer'))
+    assert file_name.read_text() == 't,buffer\n' + ''.join(f'{t!r},{item!r}\n' for t, item in samples)
+
+
+def test_to_csv_without_samples(tmp_path):
+    file_name = tmp_path / 'out.csv'
+    OutVector().to_csv(file_name)
+    assert file_name.read_text() == 't,item\n'
+
+
+def test_to_csv_keeps_only_the_retained_samples(tmp_path):
+    out_vector = OutVector(retention=4)
+    for i in range(10):
+        out_vector.add(i * 0.5, i / 3)
+
+    file_name = tmp_path / 'out.csv'
+    out_vector.to_csv(file_name)
+    lines = file_name.read_text().splitlines()[1:]
+    assert lines == [f'{t!r},{item!r}' for t, item in out_vector.get_items()]
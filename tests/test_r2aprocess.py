@@ -0,0 +1,84 @@
+import contextlib
+import io
+import json
+import os
+import pickle
+from multiprocessing import shared_memory
+
+import pytest
+
+from base.session import Session
+from connection.segment_index import SegmentIndex
+from dash_client import DashClient
+
+repository_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+url_mpd = 'http://localhost/DASH/BigBuckBunny/1sec/BigBuckBunny_1s_simple_2014_05_09.mpd'
+qi = [46980, 91917, 135410, 182366, 226106, 270316, 352546, 424520, 537825, 620705,
+      808057, 1071529, 1312787, 1662536, 2234145, 2617284, 3305118, 3841983, 4242923, 4726737]
+mpd = ('<?xml version="1.0"?><MPD xmlns="urn:mpeg:dash:schema:mpd:2011" minBufferTime="PT1.5S">'
+       '<ProgramInformation><Title>test</Title></ProgramInformation><Period duration="PT0H0M12.0S">'
+       '<AdaptationSet segmentAlignment="true"><SegmentTemplate timescale="96" '
+       'media="bunny_$Bandwidth$bps/BigBuckBunny_1s$Number$.m4s" startNumber="1" duration="96"/>' +
+       ''.join(f'<Representation id="{q}" mimeType="video/mp4" bandwidth="{q}"/>' for q in qi) +
+       '</AdaptationSet></Period></MPD>')
+segments = 12
+
+
+def build_offline(tmp_path, **parameters):
+    segment_index = SegmentIndex(url_mpd, mpd, qi, segments)
+    for quality_id in qi:
+        for segment_id in range(1, segments + 1):
+            segment_index.add_segment_size(quality_id, segment_id, quality_id // 8)
+    segment_index.save(str(tmp_path / 'dataset.idx'))
+
+    with open(os.path.join(repository_dir, 'dash_client.json')) as f:
+        config_parameters = json.load(f)
+
+    config_parameters.update(url_mpd=url_mpd, dataset_index=str(tmp_path / 'dataset.idx'), clock='virtual',
+                             headless=True, plots='none', results_dir=str(tmp_path / 'results'), max_buffer_size=5)
+    config_parameters.update(parameters)
+
+    return DashClient(Session.from_parameters(config_parameters))
+
+
+def run_offline(tmp_path, **parameters):
+    dash_client = build_offline(tmp_path, **parameters)
+    with contextlib.redirect_stdout(io.StringIO()):
+        dash_client.run_application()
+
+    return dash_client
+
+
+def test_r2a_process_runs_a_session(tmp_path):
+    dash_client = run_offline(tmp_path, r2a_algorithm='R2AProcess', process_r2a_algorithm='R2ATruong')
+
+    summary = dash_client.get_summary()
+    assert summary['played_time'] == segments
+    assert summary['decisions'] == segments + 1
+
+    # the plots of the worker algorithm came back, and can go to another process again
+    plots = dash_client.session.results.plots
+    assert any(name.startswith('comparacao_throughput') for name in plots)
+    assert 'decision_latency' in plots
+    pickle.dumps(plots)
+
+
+def test_r2a_process_decides_as_in_process(tmp_path):
+    in_process = run_offline(tmp_path, r2a_algorithm='R2ATruong')
+    worker = run_offline(tmp_path, r2a_algorithm='R2AProcess', process_r2a_algorithm='R2ATruong')
+
+    assert list(worker.player.playback_qi.get_items()) == list(in_process.player.playback_qi.get_items())
+
+
+def test_r2a_process_raises_when_the_worker_exits(tmp_path):
+    # the worker fails to import the algorithm and exits
+    dash_client = build_offline(tmp_path, r2a_algorithm='R2AProcess', process_r2a_algorithm='R2AMissing')
+
+    with pytest.raises(RuntimeError, match='exited with code 1'):
+        with contextlib.redirect_stdout(io.StringIO()):
+            dash_client.run_application()
+
+    # and the shared memory was released
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=dash_client.r2a.shared_whiteboard.get_name())
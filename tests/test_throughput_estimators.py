@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from player.throughput_estimators import P2Quantile
+
+quantiles = [0.1, 0.25, 0.5, 0.9]
+
+
+@pytest.mark.parametrize('p', quantiles)
+def test_quantile_of_the_first_samples(p):
+    samples = np.random.default_rng(1).lognormal(15, 0.5, 6)
+    quantile = P2Quantile(p)
+    assert quantile.get_estimate() is None
+
+    for count, sample in enumerate(samples, 1):
+        quantile.add(sample)
+        if count <= 5:
+            # still the samples themselves
+            assert quantile.get_estimate() == pytest.approx(np.quantile(samples[:count], p))
+        else:
+            # the markers only approximate the quantile from now on
+            assert samples.min() < quantile.get_estimate() < samples.max()
+
+
+@pytest.mark.parametrize('p', quantiles)
+def test_quantile_of_a_long_stream(p):
+    samples = np.random.default_rng(2).lognormal(15, 0.5, 20000)
+    quantile = P2Quantile(p)
+    for sample in samples:
+        quantile.add(sample)
+
+    assert quantile.get_estimate() == pytest.approx(np.quantile(samples, p), rel=0.01)
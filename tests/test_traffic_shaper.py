@@ -0,0 +1,48 @@
+import pytest
+
+from connection.traffic_shaper import TrafficShaper
+
+fractional_intervals = [0.1, 0.3, 0.7, 1.1]
+
+
+def build_shaper(value_interval, values=(1e6, 2e6, 3e6), profile_interval=5):
+    # a single profile, its values change every value_interval seconds
+    return TrafficShaper([list(values)], [0], profile_interval, value_interval)
+
+
+@pytest.mark.parametrize('value_interval', fractional_intervals)
+def test_next_change_always_moves_forward(value_interval):
+    shaper = build_shaper(value_interval)
+
+    t = 0
+    while t < 30:
+        next_change = shaper.get_next_change(t)
+        assert t < next_change <= t + value_interval + 1e-9
+        t = next_change
+
+
+@pytest.mark.parametrize('value_interval', fractional_intervals)
+def test_bits_between_is_the_sum_of_the_rates(value_interval):
+    shaper = build_shaper(value_interval, values=(2e6,))
+    assert shaper.get_bits_between(0.05, 9.05) == pytest.approx(2e6 * 9)
+
+    # the rate of each interval, from the start of the first one
+    shaper = build_shaper(value_interval)
+    expected = sum(shaper.get_rate(i * value_interval + value_interval / 2) * value_interval for i in range(20))
+    assert shaper.get_bits_between(0, 20 * value_interval) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('value_interval', fractional_intervals)
+def test_finish_time_is_the_inverse_of_bits_between(value_interval):
+    shaper = build_shaper(value_interval)
+
+    for started_at in (0, 0.5, 0.9, 2.1, 5.5):
+        for bits in (1, 1e5, 3e6, 4e7):
+            finish_time = shaper.get_finish_time(started_at, bits)
+            assert finish_time > started_at
+            assert shaper.get_bits_between(started_at, finish_time) == pytest.approx(bits)
+
+
+def test_finish_time_of_a_constant_rate():
+    shaper = build_shaper(0.1, values=(1e6,))
+    assert shaper.get_finish_time(0.5, 3e6) == pytest.approx(3.5)